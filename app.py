@@ -1,29 +1,153 @@
 # Imports
+import time
+started = time.perf_counter()
+import datetime
+import json
+import logging
+import multiprocessing
+import threading
 import dash
+import flask
+import numpy as np
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_table as dt
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State, ClientsideFunction
+import settings
 from app_utils import *
+from cache import LRUCache, normalize_equipment
+from metrics import instrument, registry
+from pool import TaskPool
+from weight_classes import SCHEMES
 
 # Define some global variables
 list_equipment = ['Raw', 'Wraps', 'Single-ply', 'Multi-ply']
-list_classes = ['IPF', 'WRPF']
+list_classes = list(SCHEMES)
 list_columns = ['Date', 'Meet', 'Federation', 'ParentFederation', 'WeightClass',
                 'Squat1', 'Squat2', 'Squat3', 'Squat',
                 'Bench1', 'Bench2', 'Bench3', 'Bench',
                 'Deadlift1', 'Deadlift2', 'Deadlift3', 'Deadlift',
                 'Total', 'Wilks'
                 ]
+first_year = 1964
+last_year = datetime.date.today().year
+page_size = 20
+population_lifters = 10
+retry_interval = 60
+
+# Seconds taken by each phase of the startup and of the last refresh of the data
+startup_timings = {'imports': time.perf_counter() - started}
+refresh_timings = {}
+
+logger = logging.getLogger(__name__)
+
+# Data, loaded in the background so the app serves while it warms up. The callbacks read it through this reference,
+# which is replaced when there is a new version
+dataset = None
+dataset_ready = threading.Event()
+
+# Initialize the cache of figures and tables, the cache of rankings and the cache of populations
+results = LRUCache(settings.CACHE_SIZE)
+rankings = LRUCache(settings.RANKINGS_CACHE_SIZE)
+populations = LRUCache(settings.POPULATION_CACHE_SIZE)
+
+# Initialize the pool of processes for the heaviest callbacks, if enabled. The data queried through a backend is not
+# loaded, so there is nothing to share with it
+pool = TaskPool(settings.POOL_WORKERS) if settings.POOL_WORKERS > 0 and settings.BACKEND == 'pandas' else None
+
+
+# Define the loading of the data
+def get_dataset():
+    """
+    Get the dataset, waiting a bit for it if the app is warming up.
+
+    :return: Dataset, data with its precomputed structures, None if it is not loaded yet.
+    """
+    dataset_ready.wait(settings.WARMUP_WAIT)
+
+    return dataset
+
+
+def run_heavy(ds, func, *args):
+    """
+    Run a CPU heavy function of the dataset in the pool of processes if it is enabled, in this thread otherwise.
+
+    :param Dataset ds: data from all the meets.
+    :param callable func: function of the module level taking the dataset and the arguments.
+    :param args: arguments of the function.
+    :return: result of the function.
+    """
+    if pool is None:
+        return func(ds, *args)
+
+    return pool.run(ds, func, *args)
+
+
+def load_dataset_in_background():
+    """
+    Load the data, retrying until it succeeds, and then check for new versions periodically.
+    """
+    global dataset
+
+    # Load the data, sharing it with the pool of processes before using it
+    while dataset is None:
+        try:
+            new_dataset = load_dataset(timings=startup_timings)
+            if pool is not None:
+                with timed(startup_timings, 'share with pool'):
+                    pool.share(new_dataset)
+            dataset = new_dataset
+        except Exception:
+            logger.exception('Could not load the data, retrying in %d seconds', retry_interval)
+            time.sleep(retry_interval)
+    startup_timings['total'] = time.perf_counter() - started
+    dataset_ready.set()
+    logger.info('Startup: %s', ', '.join('{} {:.2f} s'.format(phase, seconds)
+                                         for phase, seconds in startup_timings.items()))
+
+    # Check for new versions
+    if settings.REFRESH_INTERVAL > 0:
+        refresh_dataset_periodically(settings.REFRESH_INTERVAL)
+
+
+def refresh_dataset():
+    """
+    Replace the dataset by a new version if there is one. The requests in progress keep the previous one.
+    """
+    global dataset
+
+    # Load the new version and precompute its structures before making it visible
+    new_dataset = load_dataset(dataset.version, refresh_timings)
+    if new_dataset is not None:
+        if pool is not None:
+            with timed(refresh_timings, 'share with pool'):
+                pool.share(new_dataset)
+        dataset = new_dataset
+        logger.info('Using version %s of the data', dataset.version)
+
+
+def refresh_dataset_periodically(interval):
+    """
+    Check for a new version of the data periodically.
+
+    :param int interval: seconds between checks.
+    """
+    while True:
+        time.sleep(interval)
+        try:
+            refresh_dataset()
+        except Exception:
+            logger.exception('Could not refresh the data, keeping version %s', dataset.version)
 
-# Load data
-data = load_data()
 
 # Initialize the app
 app = dash.Dash(__name__, external_stylesheets=['https://codepen.io/chriddyp/pen/bWLwgP.css'])
 
 # Define the layout
 app.layout = html.Div(children=[
+    # Timer to redraw everything once the data is loaded, disabled from then on
+    dcc.Interval(id='warmup-interval', interval=2000),
+
     dcc.Tabs([
 
         # Tab for global stats:
@@ -55,7 +179,8 @@ app.layout = html.Div(children=[
                         html.H3(children="Weight classes"),
                         dcc.Dropdown(id='globalstats-dropdown-weight_classes',
                                      options=[{'label': i, 'value': i} for i in list_classes],
-                                     value='IPF'
+                                     value='IPF',
+                                     clearable=False
                                      )
                     ], className='four columns'),
 
@@ -64,20 +189,93 @@ app.layout = html.Div(children=[
                         html.H3(children="Lifters per class:"),
                         dcc.Slider(id='globalstats-slider-top',
                                    min=1,
-                                   max=100,
-                                   marks={10 * i: str(10 * i) for i in range(1, 10)},
-                                   value=10
+                                   max=MAX_LIFTERS,
+                                   marks={10 * i: str(10 * i) for i in range(1, MAX_LIFTERS // 10)},
+                                   value=10,
+                                   updatemode='drag'
                                    )
                     ], className='four columns')
                 ], className='row'),
 
-                # Plots
-                html.Div(children=dcc.Graph(id='globalstats-graph-men')),
-                html.Div(children=dcc.Graph(id='globalstats-graph-women'))
+                # Slider to select the years of the meets
+                html.Div(children=[
+                    html.H3(children="Years:"),
+                    dcc.RangeSlider(id='globalstats-slider-years',
+                                    min=first_year,
+                                    max=last_year,
+                                    step=1,
+                                    marks={year: str(year) for year in range(first_year - first_year % 10 + 10,
+                                                                              last_year + 1, 10)},
+                                    value=[first_year, last_year]
+                                    )
+                ], className='row'),
+
+                # Plots, drawn in the browser from the figures with the best lifters kept in the store
+                dcc.Loading(children=[
+                    dcc.Store(id='globalstats-store'),
+                    html.Div(children=dcc.Graph(id='globalstats-graph-men')),
+                    html.Div(children=dcc.Graph(id='globalstats-graph-women'))
+                ])
 
             ]
         ),
 
+        # Tab for the whole population:
+        # * Menus to select options
+        # * Plot with the density of all the meets and the top lifts per weight class
+        dcc.Tab(
+            id='tab-population',
+            label='Population',
+            children=[
+                # Dropdown menus to select options
+                html.Div(children=[
+
+                    # Menu for sex
+                    html.Div(children=[
+                        html.H3(children="Sex:"),
+                        dcc.Dropdown(id='population-dropdown-sex',
+                                     options=[{'label': 'Men', 'value': 'M'}, {'label': 'Women', 'value': 'F'}],
+                                     value='M',
+                                     clearable=False
+                                     )
+                    ], className='three columns'),
+
+                    # Menu for lift
+                    html.Div(children=[
+                        html.H3(children="Lift:"),
+                        dcc.Dropdown(id='population-dropdown-lift',
+                                     options=[{'label': i, 'value': i} for i in DENSITY_LIFTS],
+                                     value='Total',
+                                     clearable=False
+                                     )
+                    ], className='three columns'),
+
+                    # Menu for equipment
+                    html.Div(children=[
+                        html.H3(children="Equipment:"),
+                        dcc.Dropdown(id='population-dropdown-equipment',
+                                     options=[{'label': i, 'value': i} for i in list_equipment],
+                                     value=['Raw'],
+                                     multi=True
+                                     )
+                    ], className='three columns'),
+
+                    # Menu for weight classes
+                    html.Div(children=[
+                        html.H3(children="Weight classes"),
+                        dcc.Dropdown(id='population-dropdown-weight_classes',
+                                     options=[{'label': i, 'value': i} for i in list_classes],
+                                     value='IPF',
+                                     clearable=False
+                                     )
+                    ], className='three columns')
+                ], className='row'),
+
+                # Plot, binned again in the server when it is zoomed
+                html.Div(children=dcc.Loading(dcc.Graph(id='population-graph')))
+            ]
+        ),
+
         # Tab for lifter stats:
         # * Dropdown menu to select the lifter
         # * Plot with squat evolution
@@ -91,12 +289,32 @@ app.layout = html.Div(children=[
                 # Dropdown menu to select the lifter
                 dcc.Dropdown(
                     id='lifterstats-dropdown-name',
-                    options=[{'label': name, 'value': name} for name in data['Name'].unique().tolist()],
-                    value='Taylor Atwood'
+                    options=[],
+                    value='Taylor Atwood',
+                    placeholder='Search a lifter...'
                 ),
 
                 # Plots
-                html.Div(children=dcc.Graph(id='lifterstats-graph-evolution')),
+                html.Div(children=dcc.Loading(dcc.Graph(id='lifterstats-graph-evolution'))),
+
+                # Table with the ranks of the best lifts
+                html.Div(children=[
+                    html.H3(children="Ranks in weight classes of:"),
+                    dcc.Dropdown(id='lifterstats-dropdown-weight_classes',
+                                 options=[{'label': i, 'value': i} for i in list_classes],
+                                 value=list_classes[0],
+                                 clearable=False
+                                 )
+                ], className='row'),
+                dt.DataTable(
+                    id='lifterstats-datatable-ranks',
+                    columns=[{'id': col, 'name': col} for col in ['Lift', 'Best', 'Equipment', 'WeightClass', 'Date',
+                                                                  'Rank', 'Lifters', 'Percentile']],
+                    style_header={
+                        'backgroundColor': 'rgb(230, 230, 230)',
+                        'fontWeight': 'bold'
+                    }
+                ),
 
                 # Table with the data of the meets
                 dt.DataTable(
@@ -116,6 +334,81 @@ app.layout = html.Div(children=[
                     }
                 )
             ]
+        ),
+
+        # Tab for rankings:
+        # * Menus to filter the lifters
+        # * Table with the best meet of each lifter, sorted and paginated in the server
+        dcc.Tab(
+            id='tab-rankings',
+            label='Rankings',
+            children=[
+                # Dropdown menus to filter the lifters
+                html.Div(children=[
+
+                    # Menu for sex
+                    html.Div(children=[
+                        html.H3(children="Sex:"),
+                        dcc.Dropdown(id='rankings-dropdown-sex',
+                                     options=[{'label': 'Men', 'value': 'M'}, {'label': 'Women', 'value': 'F'}],
+                                     value='M'
+                                     )
+                    ], className='three columns'),
+
+                    # Menu for equipment
+                    html.Div(children=[
+                        html.H3(children="Equipment:"),
+                        dcc.Dropdown(id='rankings-dropdown-equipment',
+                                     options=[{'label': i, 'value': i} for i in list_equipment],
+                                     value=['Raw'],
+                                     multi=True
+                                     )
+                    ], className='three columns'),
+
+                    # Menu for federations
+                    html.Div(children=[
+                        html.H3(children="Federation:"),
+                        dcc.Dropdown(id='rankings-dropdown-federation',
+                                     options=[],
+                                     multi=True,
+                                     placeholder='All'
+                                     )
+                    ], className='three columns'),
+
+                    # Menu for countries
+                    html.Div(children=[
+                        html.H3(children="Country:"),
+                        dcc.Dropdown(id='rankings-dropdown-country',
+                                     options=[],
+                                     multi=True,
+                                     placeholder='All'
+                                     )
+                    ], className='three columns')
+                ], className='row'),
+
+                # Table with the rankings
+                dt.DataTable(
+                    id='rankings-datatable',
+                    columns=[{'id': col, 'name': col} for col in RANKING_COLUMNS],
+                    style_table={'overflowX': 'auto'},
+                    page_current=0,
+                    page_size=page_size,
+                    page_action='custom',
+                    sort_action='custom',
+                    sort_mode='single',
+                    sort_by=[{'column_id': 'Wilks', 'direction': 'desc'}],
+                    style_data_conditional=[
+                        {
+                            'if': {'row_index': 'odd'},
+                            'backgroundColor': 'rgb(248, 248, 248)'
+                        }
+                    ],
+                    style_header={
+                        'backgroundColor': 'rgb(230, 230, 230)',
+                        'fontWeight': 'bold'
+                    }
+                )
+            ]
         )
     ])
 ])
@@ -123,84 +416,433 @@ app.layout = html.Div(children=[
 
 # Define the callbacks
 @app.callback(
-    Output('globalstats-graph-men', 'figure'),
+    Output('globalstats-store', 'data'),
     [Input('globalstats-dropdown-weight_classes', 'value'),
      Input('globalstats-dropdown-equipment', 'value'),
-     Input('globalstats-slider-top', 'value')]
+     Input('globalstats-slider-years', 'value'),
+     Input('warmup-interval', 'disabled')]
     )
-def display_globalstats_graph_men(classes, equipment, n):
+@instrument(kind='callback', profile=True)
+def store_globalstats_graphs(classes, equipment, years, ready):
     """
-    Plot best lifts for men lifters.
+    Plot the best lifts for men and women lifters in a single request, with the maximum number of lifters of each
+    weight class. The number of lifters selected is taken in the browser, so the slider does not ask the server.
 
-    :param str classes: federation to take weight classes from. 'IPF' or 'WRPF'.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
     :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
-    :param int n: number of lifters to keep of each weight class.
-    :return fig: Figure, figure with the plot.
+    :param list years: first and last year of the meets.
+    :param bool ready: flag indicating if the data is loaded, only used to redraw once it is.
+    :return: dict, with the figure for men as 'M' and the figure for women as 'F'.
     """
-    # Load and clean data
-    df = clean_data(data, classes, equipment)
+    # Use the same version of the data during the whole request
+    ds = get_dataset()
+    if ds is None:
+        return {'M': get_warming_up_figure(), 'F': get_warming_up_figure()}
+    if classes not in SCHEMES:
+        return dash.no_update
+
+    # Take all the meets if the whole range of years is selected
+    if not years or (years[0] <= first_year and years[1] >= last_year):
+        years = None
+    else:
+        years = tuple(years)
+
+    # Make the figures, or take them from the cache
+    equipment = normalize_equipment(equipment)
+    figures = results.get_or_compute(
+        ds.version,
+        ('globalstats', classes, equipment, years),
+        lambda: run_heavy(ds, plot_best_lifts_of_both_sexes, classes, equipment, MAX_LIFTERS, years)
+    )
 
-    # Make the figure
-    fig = plot_best_lifts_per_weightclass(df, 'M', classes, n)
+    return figures
 
-    return fig
+
+# Keep the n best lifters of each weight class in the browser, see assets/globalstats.js
+app.clientside_callback(
+    ClientsideFunction(namespace='globalstats', function_name='sliceTop'),
+    [Output('globalstats-graph-men', 'figure'),
+     Output('globalstats-graph-women', 'figure')],
+    [Input('globalstats-slider-top', 'value'),
+     Input('globalstats-store', 'data')]
+)
 
 
 @app.callback(
-    Output('globalstats-graph-women', 'figure'),
-    [Input('globalstats-dropdown-weight_classes', 'value'),
-     Input('globalstats-dropdown-equipment', 'value'),
-     Input('globalstats-slider-top', 'value')])
-def display_globalstats_graph_women(classes, equipment, n):
+    Output('population-graph', 'figure'),
+    [Input('population-dropdown-weight_classes', 'value'),
+     Input('population-dropdown-equipment', 'value'),
+     Input('population-dropdown-sex', 'value'),
+     Input('population-dropdown-lift', 'value'),
+     Input('population-graph', 'relayoutData'),
+     Input('warmup-interval', 'disabled')])
+@instrument(kind='callback', profile=True)
+def display_population_graph(classes, equipment, sex, lift, relayout_data, ready):
     """
-    Plot best lifts for women lifters.
+    Plot the density of all the meets with the best lifters on top, binning again only the window shown when the plot
+    is zoomed or panned, so the bins get finer.
 
-    :param str classes: federation to take weight classes from. 'IPF' or 'WRPF'.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
     :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
-    :param int n: number of lifters to keep of each weight class.
-    :return fig: Figure, figure with the plot.
+    :param str sex: sex of the lifters. 'M' or 'F'.
+    :param str lift: lift to plot. 'Total' or 'Wilks'.
+    :param dict relayout_data: changes of the layout of the plot, with the window when it is zoomed or panned.
+    :param bool ready: flag indicating if the data is loaded, only used to redraw once it is.
+    :return: Figure, fig with the plot.
     """
-    # Load and clean data
-    df = clean_data(data, classes, equipment)
+    # Use the same version of the data during the whole request
+    ds = get_dataset()
+    if ds is None:
+        return get_warming_up_figure()
+    if not isinstance(ds, Dataset):
+        return get_message_figure('The population needs the data in memory, set OPL_BACKEND=pandas')
+
+    # Take the population, or take it from the cache
+    equipment = normalize_equipment(equipment)
+    population = populations.get_or_compute(ds.version,
+                                            (equipment, sex, lift),
+                                            lambda: get_population(ds.data, equipment, sex, lift)
+                                            )
+
+    # Bin the window shown if the plot changed, the whole population if the filters changed
+    triggered = [trigger['prop_id'] for trigger in dash.callback_context.triggered]
+    if triggered == ['population-graph.relayoutData']:
+        x_range, y_range = get_zoom_window(relayout_data)
+        if x_range is not None or y_range is not None:
+            return plot_population(ds, population, sex, classes, equipment, lift, population_lifters, x_range, y_range)
+
+    # Make the figure of the whole population, or take it from the cache
+    return results.get_or_compute(
+        ds.version,
+        ('population', classes, equipment, sex, lift),
+        lambda: plot_population(ds, population, sex, classes, equipment, lift, population_lifters)
+    )
 
-    # Make the figure
-    fig = plot_best_lifts_per_weightclass(df, 'F', classes, n)
 
-    return fig
+@app.callback(
+    Output('lifterstats-dropdown-name', 'options'),
+    [Input('lifterstats-dropdown-name', 'search_value')],
+    [State('lifterstats-dropdown-name', 'value')])
+@instrument(kind='callback', profile=True)
+def search_lifterstats_dropdown_name(search_value, name):
+    """
+    Search the lifters matching the text written in the dropdown.
+
+    :param str search_value: text written by the user.
+    :param str name: name of the selected lifter, which has to stay in the options.
+    :return: list, options of the dropdown.
+    """
+    # Search the names
+    ds = get_dataset()
+    names = ds.names.search(search_value) if ds is not None else []
+
+    # Keep the selected lifter
+    if name and name not in names:
+        names = [name] + names
+
+    return [{'label': name, 'value': name} for name in names]
 
 
 @app.callback(
     Output('lifterstats-graph-evolution', 'figure'),
-    [Input('lifterstats-dropdown-name', 'value')])
-def display_lifterstats_graph_evolution(name):
+    [Input('lifterstats-dropdown-name', 'value'),
+     Input('warmup-interval', 'disabled')])
+@instrument(kind='callback', profile=True)
+def display_lifterstats_graph_evolution(name, ready):
     """
     Filter meet data for a lifter and plot evolution for the squat.
 
     :param str name: name of the lifter.
+    :param bool ready: flag indicating if the data is loaded, only used to redraw once it is.
     :return fig: Figure, figure with the plot.
     """
-    # Make the figure
-    fig = plot_lift_evolution_per_lifter(data, name)
+    # Use the same version of the data during the whole request
+    ds = get_dataset()
+    if ds is None:
+        return get_warming_up_figure()
+
+    # Make the figure, or take it from the cache
+    fig = results.get_or_compute(ds.version,
+                                 ('lifterstats-evolution', name),
+                                 lambda: plot_lift_evolution(ds.get_lifter_meets(name))
+                                 )
 
     return fig
 
 
 @app.callback(
     Output('lifterstats-datatable-meets', 'data'),
-    [Input('lifterstats-dropdown-name', 'value')])
-def display_lifterstats_table_meets(name):
+    [Input('lifterstats-dropdown-name', 'value'),
+     Input('warmup-interval', 'disabled')])
+@instrument(kind='callback', profile=True)
+def display_lifterstats_table_meets(name, ready):
     """
     Filter meet data for a lifter and sort it by date.
 
     :param str name: name of the lifter.
+    :param bool ready: flag indicating if the data is loaded, only used to redraw once it is.
     :return: dict, meet data in record format.
     """
-    # Make the table
-    table = table_meets_per_lifter(data, name)
+    # Use the same version of the data during the whole request
+    ds = get_dataset()
+    if ds is None:
+        return []
+
+    # Make the table, or take it from the cache
+    table = results.get_or_compute(ds.version,
+                                   ('lifterstats-meets', name),
+                                   lambda: table_meets(ds.get_lifter_meets(name))
+                                   )
 
     return table
 
 
+@app.callback(
+    Output('lifterstats-datatable-ranks', 'data'),
+    [Input('lifterstats-dropdown-name', 'value'),
+     Input('lifterstats-dropdown-weight_classes', 'value'),
+     Input('warmup-interval', 'disabled')])
+@instrument(kind='callback', profile=True)
+def display_lifterstats_table_ranks(name, classes, ready):
+    """
+    Rank the best lifts of a lifter among the lifters of the same equipment, sex and weight class.
+
+    :param str name: name of the lifter.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param bool ready: flag indicating if the data is loaded, only used to redraw once it is.
+    :return: dict, ranks in record format.
+    """
+    # Use the same version of the data during the whole request
+    ds = get_dataset()
+    if not isinstance(ds, Dataset) or classes not in SCHEMES:
+        return []
+
+    # Make the table, or take it from the cache
+    table = results.get_or_compute(ds.version,
+                                   ('lifterstats-ranks', name, classes),
+                                   lambda: table_lift_ranks(ds.get_lifter_ranks([name], classes))
+                                   )
+
+    return table
+
+
+@app.callback(
+    [Output('rankings-datatable', 'data'),
+     Output('rankings-datatable', 'page_count'),
+     Output('rankings-datatable', 'page_current')],
+    [Input('rankings-datatable', 'page_current'),
+     Input('rankings-datatable', 'page_size'),
+     Input('rankings-datatable', 'sort_by'),
+     Input('rankings-dropdown-sex', 'value'),
+     Input('rankings-dropdown-equipment', 'value'),
+     Input('rankings-dropdown-federation', 'value'),
+     Input('rankings-dropdown-country', 'value'),
+     Input('warmup-interval', 'disabled')])
+@instrument(kind='callback', profile=True)
+def display_rankings_table(page, size, sort_by, sex, equipment, federations, countries, ready):
+    """
+    Rank the lifters by the selected lift and make the page of the table shown.
+
+    :param int page: number of the page, starting at 0.
+    :param int size: number of lifters per page.
+    :param list sort_by: column and direction to sort by, only the lifts can be sorted by.
+    :param str sex: sex of the lifters, None for both.
+    :param list equipment: allowed equipment for the meets.
+    :param list federations: allowed federations for the meets, all of them if empty.
+    :param list countries: allowed countries for the lifters, all of them if empty.
+    :param bool ready: flag indicating if the data is loaded, only used to redraw once it is.
+    :return data: dict, meet data of the page in record format.
+    :return page_count: int, number of pages.
+    :return page_current: int, number of the page, back to the first one when the filters change.
+    """
+    # Use the same version of the data during the whole request
+    ds = get_dataset()
+    if not isinstance(ds, Dataset):
+        return [], 1, 0
+
+    # Go back to the first page if the filters changed, the previous one may not exist anymore
+    triggered = [trigger['prop_id'].split('.')[0] for trigger in dash.callback_context.triggered]
+    if any(trigger.startswith('rankings-dropdown-') for trigger in triggered):
+        page = 0
+
+    # Rank by the selected lift, by Wilks if it is not a lift
+    lift, direction = 'Wilks', 'desc'
+    if sort_by and sort_by[0]['column_id'] in LIFTS:
+        lift, direction = sort_by[0]['column_id'], sort_by[0]['direction']
+
+    # Rank the lifters, or take the ranking from the cache
+    filters = {'Sex': (sex,) if sex else (),
+               'Equipment': normalize_equipment(equipment),
+               'Federation': tuple(sorted(federations or [])),
+               'Country': tuple(sorted(countries or []))}
+    positions = rankings.get_or_compute(ds.version,
+                                        (lift,) + tuple(filters.values()),
+                                        lambda: ds.rankings.rank(lift, filters)
+                                        )
+
+    # Make the page, reading the ranking from the end if the order is ascending
+    start = (page or 0) * size
+    stop = min(start + size, len(positions))
+    ranks = np.arange(start, max(start, stop))
+    if direction == 'asc':
+        ranks = len(positions) - 1 - ranks
+    table = table_rankings(ds.data, positions[ranks], ranks + 1)
+
+    return table, max(1, -(-len(positions) // size)), page or 0
+
+
+@app.callback(
+    [Output('rankings-dropdown-federation', 'options'),
+     Output('rankings-dropdown-country', 'options')],
+    [Input('warmup-interval', 'disabled')])
+def display_rankings_dropdown_filters(ready):
+    """
+    Fill the menus of the rankings with the federations and countries in the data.
+
+    :param bool ready: flag indicating if the data is loaded, only used to fill them once it is.
+    :return federations: list, options of the menu of federations.
+    :return countries: list, options of the menu of countries.
+    """
+    ds = get_dataset()
+    if not isinstance(ds, Dataset):
+        return [], []
+
+    return [[{'label': value, 'value': value} for value in ds.rankings.values[col]]
+            for col in ['Federation', 'Country']]
+
+
+@app.callback(
+    Output('warmup-interval', 'disabled'),
+    [Input('warmup-interval', 'n_intervals')])
+def check_warmup(n_intervals):
+    """
+    Stop the timer once the data is loaded, which redraws everything. The flag is left untouched until then, since
+    setting it, even to the same value, fires again every callback using it.
+
+    :param int n_intervals: number of times the timer has fired.
+    :return: bool, flag indicating if the data is loaded.
+    """
+    if not dataset_ready.is_set():
+        return dash.no_update
+
+    return True
+
+
+# Measure the whole requests to the callbacks, which includes the serialization of their outputs
+@app.server.before_request
+def start_request_metrics():
+    """
+    Record when the request starts.
+    """
+    flask.g.started = (time.perf_counter(), time.thread_time())
+
+
+@app.server.after_request
+def record_request_metrics(response):
+    """
+    Record the time taken by a request to a callback and the size of its response.
+
+    :param flask.Response response: response to the request.
+    :return: flask.Response, the same response.
+    """
+    if settings.METRICS and flask.request.path == '/_dash-update-component' and 'started' in flask.g:
+        wall, cpu = flask.g.started
+        output = (flask.request.get_json(silent=True) or {}).get('output')
+        callback = app.callback_map.get(output, {}).get('callback')
+        registry.record('request', getattr(callback, '__name__', str(output)),
+                        time.perf_counter() - wall, time.thread_time() - cpu, error=response.status_code >= 500,
+                        size=response.calculate_content_length() or 0)
+
+    return response
+
+
+# Define the routes for health checks
+@app.server.route('/health')
+def health():
+    """
+    Check that the app is running.
+
+    :return: str, response.
+    """
+    return 'OK'
+
+
+@app.server.route('/ready')
+def ready():
+    """
+    Check that the data is loaded, reporting the seconds taken by each phase of the startup.
+
+    :return: tuple, response with the timings and status code, 503 while the app warms up.
+    """
+    status = 200 if dataset_ready.is_set() else 503
+
+    return json.dumps(startup_timings), status, {'Content-Type': 'application/json'}
+
+
+@app.server.route('/api/ranks')
+def api_ranks():
+    """
+    Rank the best lifts of several lifters at once, given as repeated 'name' parameters, in the weight classes of the
+    'classes' parameter (the first scheme by default).
+
+    :return: tuple, response with the ranks of each lifter in json, 503 while the app warms up and 501 if the data is
+        queried through a backend.
+    """
+    ds = get_dataset()
+    if ds is None:
+        return json.dumps({'error': 'The data is loading'}), 503, {'Content-Type': 'application/json'}
+    if not isinstance(ds, Dataset):
+        return json.dumps({'error': 'The ranks need the data in memory'}), 501, {'Content-Type': 'application/json'}
+    classes = flask.request.args.get('classes', list_classes[0])
+    if classes not in SCHEMES:
+        return json.dumps({'error': 'Unknown weight classes ' + classes}), 400, {'Content-Type': 'application/json'}
+
+    # Rank the lifts of all the lifters together
+    names = flask.request.args.getlist('name')
+    ranks = ds.get_lifter_ranks(names, classes)
+    response = {name: table_lift_ranks(ranks.loc[ranks['Name'] == name]) for name in names}
+
+    return json.dumps(response), 200, {'Content-Type': 'application/json'}
+
+
+@app.server.route('/metrics')
+def metrics():
+    """
+    Report the metrics of the callbacks and their stages, the cache and the loading of the data.
+
+    :return: tuple, response in the Prometheus text format.
+    """
+    # Cache
+    stats = results.stats()
+    for name, value in stats.items():
+        registry.set_gauge('opl_cache_' + name, value, description='Counters of the cache of figures and tables.')
+    lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+    registry.set_gauge('opl_cache_hit_ratio', (stats['hits'] + stats['coalesced']) / lookups if lookups else 0,
+                       description='Share of the lookups answered from the cache or from a computation in progress.')
+
+    # Pool of processes
+    if pool is not None:
+        for name, value in pool.stats().items():
+            registry.set_gauge('opl_pool_' + name, value, description='Counters of the pool of processes.')
+
+    # Data
+    registry.set_gauge('opl_dataset_ready', int(dataset_ready.is_set()),
+                       description='Flag indicating if the data is loaded.')
+    registry.set_gauge('opl_dataset_rows', len(dataset.data) if isinstance(dataset, Dataset) else 0,
+                       description='Number of meets of the data in memory.')
+    for load, timings in [('startup', startup_timings), ('refresh', refresh_timings)]:
+        for phase, seconds in timings.items():
+            registry.set_gauge('opl_dataset_load_seconds', seconds, {'load': load, 'phase': phase},
+                               description='Seconds taken by each phase of the loading of the data.')
+
+    return registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+
+# Load the data, unless this is a process of the pool, which imports the app when it is run as a script
+startup_timings['create app'] = time.perf_counter() - started - startup_timings['imports']
+if multiprocessing.parent_process() is None:
+    threading.Thread(target=load_dataset_in_background, daemon=True).start()
+
 # Run the app
 if __name__ == '__main__':
     app.run_server(debug=True)
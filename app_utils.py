@@ -1,260 +1,767 @@
 # Imports
-import requests
-import zipfile
+import base64
+import bisect
+import contextlib
+import logging
 import os
+import re
+import time
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import settings
+from backends import EVENT_LIFTS, get_backend, PandasBackend, DuckDBBackend
+from data_store import download_data, get_remote_version, open_downloaded_csv, read_manifest, is_stored, \
+    save_chunks_to_store, load_from_store, get_store_path, get_pinned_version, remove_old_versions, save_columns, \
+    load_columns, save_structures, load_structures, get_shared_version, get_shared_path
+from metrics import instrument
+from weight_classes import SCHEMES, MAX_BODYWEIGHT, get_weight_classes, assign_weight_classes
+
+logger = logging.getLogger(__name__)
+
+
+# Constants
+# Lifts shown in the plots
+LIFTS = ['Squat', 'Bench', 'Deadlift', 'Total', 'Wilks']
+
+# Maximum number of lifters per weight class shown in the plots
+MAX_LIFTERS = 100
+
+# Columns kept in the table of personal bests, besides the lift
+PERSONAL_BEST_COLUMNS = ['Name', 'Sex', 'Equipment', 'WeightClass', 'Bodyweight', 'Date']
+
+# Columns of the rankings that can be used to filter them
+RANKING_FILTERS = ['Sex', 'Equipment', 'Federation', 'Country']
+
+# Columns of the table of rankings
+RANKING_COLUMNS = ['Rank', 'Name', 'Sex', 'Equipment', 'Bodyweight', 'Federation', 'Country', 'Date', 'Meet',
+                   'Squat', 'Bench', 'Deadlift', 'Total', 'Wilks']
+
+# Lifts shown in the density plot of the whole population
+DENSITY_LIFTS = ['Total', 'Wilks']
+
+# Number of bins of the density plot along the bodyweight and along the lift
+DENSITY_BINS = (160, 120)
+
+# Maximum number of lifters returned when searching by name
+MAX_SEARCH_RESULTS = 20
+
+# Minimum length of the text to search names containing it
+MIN_SUBSTRING_SEARCH = 3
+
+# Approximate memory in bytes of a raw row of the csv once parsed
+ROW_MEMORY = 2048
+
+# Columns stored as categories in compact data
+CATEGORY_COLUMNS = ['Name', 'Sex', 'Event', 'Equipment', 'WeightClass', 'Country', 'Federation', 'ParentFederation',
+                    'Meet']
+
+# Columns stored in single precision in compact data
+FLOAT32_COLUMNS = ['Bodyweight',
+                   'Squat1', 'Squat2', 'Squat3', 'Squat',
+                   'Bench1', 'Bench2', 'Bench3', 'Bench',
+                   'Deadlift1', 'Deadlift2', 'Deadlift3', 'Deadlift',
+                   'Total'
+                   ]
 
 
 # Functions
-def download_data():
-    """
-    Download the last version of the data.
+@contextlib.contextmanager
+def timed(timings, phase):
     """
-    # Specify url
-    url = 'https://github.com/sstangl/openpowerlifting-static/raw/gh-pages/openpowerlifting-latest.zip'
+    Record the seconds taken by a block of code.
 
-    # Delete the previous version if necessary
+    :param dict timings: dict to record the seconds, with the phase as key.
+    :param str phase: name of the block of code.
+    """
+    start = time.perf_counter()
     try:
-        for folder in os.listdir('data'):
-            for file in os.listdir('data/' + folder):
-                os.remove('data/' + folder + '/' + file)
-            os.removedirs('data/' + folder)
-        os.removedirs('data')
-    except FileNotFoundError:
-        pass
+        yield
+    finally:
+        timings[phase] = time.perf_counter() - start
+
 
-    # Download zip from url
-    r = requests.get(url, stream=True)
-    with open('opl-data-main.zip', 'wb') as fd:
-        for chunk in r.iter_content(chunk_size=128):
-            fd.write(chunk)
+def store_data(refresh=False):
+    """
+    Keep every meet of the data in the local store, downloading it only if there is a new version.
 
-    # Unzip file
-    with zipfile.ZipFile('opl-data-main.zip', "r") as zip_ref:
-        zip_ref.extractall('data')
+    :param bool refresh: flag indicating if the data has to be downloaded even if it has not changed.
+    :return: str, version of the data, which may not be stored if parquet files can not be written.
+    """
+    # Find the stored version to use, if any
+    version = None if refresh else get_stored_version()
+    if version is not None:
+        return version
 
-    # Delete zip
-    os.remove('opl-data-main.zip')
+    # Download the data and save it in the store, chunk by chunk
+    version, etag = download_data()
+    with open_downloaded_csv(version) as f:
+        if save_chunks_to_store(read_chunks(f), version, etag):
+            remove_old_versions()
 
+    return version
 
-def load_data():
+
+def load_data(refresh=False, compact=settings.COMPACT, min_wilks=settings.MIN_WILKS, events=settings.EVENTS):
+    """
+    Load the meets passing the filters from the local store, downloading the data only if there is a new version.
+
+    :param bool refresh: flag indicating if the data has to be downloaded even if it has not changed.
+    :param bool compact: flag indicating if the data has to be kept with compact types.
+    :param float min_wilks: minimum Wilks of the meets, 0 to keep all of them.
+    :param list events: allowed events of the meets, all of them if empty.
+    :return: pd.DataFrame with data from openpowerlifting.org, with its version in attrs['version'].
+    """
+    version = store_data(refresh)
+
+    # Load the meets from the store, reading only the ones passing the filters, or from the csv if it is not stored
+    if is_stored(version):
+        data = load_from_store(version, get_meet_filters(min_wilks, events), CATEGORY_COLUMNS if compact else None)
+        data = filter_meets(data, min_wilks, events).reset_index(drop=True)
+    else:
+        with open_downloaded_csv(version) as f:
+            data = read_data(f, min_wilks=min_wilks, events=events)
+    if data.empty:
+        raise ValueError('Version {} of the data has no valid meets'.format(version))
+
+    # Reduce the memory of the data
+    if compact:
+        data = compact_data(data)
+
+    # Precompute the weight classes and the order used by the filters of the user
+    data = add_weight_classes(data)
+    data = data.sort_values(by='Wilks', ascending=False, ignore_index=True)
+    data.attrs['version'] = version
+
+    return data
+
+
+def refresh_data(version):
+    """
+    Load the data again if there is a version different from the given one.
+
+    :param str version: version of the data in use.
+    :return: pd.DataFrame with data from openpowerlifting.org, None if the version has not changed.
+    """
+    if version is not None and get_stored_version() == version:
+        return None
+
+    return load_data()
+
+
+def load_dataset(version=None, timings=None):
     """
-    Download the data and load it into a dataframe.
+    Load the dataset, mapping the one published in the shared folder if there is one, or open it through the backend
+    of the settings without loading it if it is not the pandas one.
 
+    :param str version: version of the data in use, None if there is none.
+    :param dict timings: dict to record the seconds taken by each phase, if given.
+    :return: Dataset, data with its precomputed structures, or BackendDataset, None if the version has not changed.
+    """
+    timings = {} if timings is None else timings
+
+    # Query the store through the backend
+    if settings.BACKEND != 'pandas':
+        with timed(timings, 'store data'):
+            new_version = store_data()
+        if new_version == version:
+            return None
+        with timed(timings, 'open backend'):
+            return BackendDataset(open_backend(settings.BACKEND, new_version), new_version)
+
+    # Map the version published in the shared folder
+    if settings.SHARED_DIR:
+        shared = get_shared_version()
+        if shared == version:
+            return None
+        with timed(timings, 'map shared data'):
+            return Dataset.load(get_shared_path(shared))
+
+    # Load the data and precompute its structures otherwise
+    with timed(timings, 'load data'):
+        data = refresh_data(version)
+    if data is None:
+        return None
+    return Dataset(data, timings)
+
+
+def get_stored_version():
+    """
+    Get the version of the store to use, which is the pinned one or the current one if the remote has not changed.
+
+    :return: str, version of the data, None if the data has to be downloaded.
+    """
+    # Use the pinned version if any
+    pinned = get_pinned_version()
+    if pinned is not None:
+        return pinned
+
+    # Use the stored version if the remote one has not changed (or can not be checked)
+    manifest = read_manifest()
+    if is_stored(manifest['current']):
+        etag = get_remote_version()
+        if etag is None or etag == manifest['etag']:
+            return manifest['current']
+
+    return None
+
+
+def open_backend(name=settings.BACKEND, version=None):
+    """
+    Open a backend to query the data, downloading it only if there is a new version.
+
+    :param str name: name of the backend, 'pandas' to load the data in memory or 'duckdb' to query the store.
+    :param str version: version of the data in the store to query, the current one if None.
+    :return: backend of the data.
+    """
+    if name == 'pandas':
+        return PandasBackend(load_data())
+    if name == 'duckdb':
+        version = store_data() if version is None else version
+        if not is_stored(version):
+            raise ValueError('The duckdb backend needs the data in the store, which needs pyarrow')
+        return DuckDBBackend(get_store_path(version))
+
+    raise ValueError('Unknown backend {}, use pandas or duckdb'.format(name))
+
+
+def read_data(path, memory=settings.INGEST_MEMORY, min_wilks=settings.MIN_WILKS, events=settings.EVENTS):
+    """
+    Read the csv with the data into a dataframe.
+
+    The csv is read in chunks that are cleaned and filtered as they arrive, so only the rows that survive the
+    cleaning are kept in memory.
+
+    :param path: path to the csv or file object with it.
+    :param int memory: approximate memory in MB for each chunk. 0 to read the whole csv at once.
+    :param float min_wilks: minimum Wilks of the meets, 0 to keep all of them.
+    :param list events: allowed events of the meets, all of them if empty.
     :return: pd.DataFrame with data from openpowerlifting.org.
     """
-    # Download the data
-    download_data()
+    data = pd.concat([filter_meets(chunk, min_wilks, events) for chunk in read_chunks(path, memory)],
+                     ignore_index=True)
+
+    return data
+
+
+def read_chunks(path, memory=settings.INGEST_MEMORY):
+    """
+    Read the csv with the data in chunks, cleaned as they arrive.
 
-    # Obtain path to the data
-    version = os.listdir('data')[0]
-    path = 'data/' + version + '/' + version + '.csv'
+    :param path: path to the csv or file object with it.
+    :param int memory: approximate memory in MB for each chunk. 0 to read the whole csv at once.
+    :return: generator of pd.DataFrame with data from openpowerlifting.org.
+    """
+    # Obtain the number of rows per chunk
+    chunksize = max(1, memory * 2 ** 20 // ROW_MEMORY) if memory else None
 
     # Load data
-    data = pd.read_csv(path,
-                       header=0,
-                       index_col=False,
-                       names=['Name',
-                              'Sex',
-                              'Event',
-                              'Equipment',
-                              'Age',
-                              'AgeClass',
-                              'BirthYearClass',
-                              'Division',
-                              'Bodyweight',  # 'BodyweightKg'
-                              'WeightClass',  # 'WeightClassKg'
-                              'Squat1',  # 'Squat1Kg'
-                              'Squat2',  # 'Squat2Kg'
-                              'Squat3',  # 'Squat3Kg'
-                              'Squat4',  # 'Squat4Kg'
-                              'Squat',  # 'Best3SquatKg'
-                              'Bench1',  # 'Bench1Kg'
-                              'Bench2',  # 'Bench2Kg'
-                              'Bench3',  # 'Bench3Kg'
-                              'Bench4',  # 'Bench4Kg'
-                              'Bench',  # 'Best3BenchKg'
-                              'Deadlift1',  # 'Deadlift1Kg'
-                              'Deadlift2',  # 'Deadlift2Kg'
-                              'Deadlift3',  # 'Deadlift3Kg'
-                              'Deadlift4',  # 'Deadlift4Kg'
-                              'Deadlift',  # 'Best3DeadliftKg'
-                              'Total',  # 'TotalKg'
-                              'Place',
-                              'Dots',
-                              'Wilks',
-                              'Glossbrenner',
-                              'Goodlift',
-                              'Tested',
-                              'Country',
-                              'State',
-                              'Federation',
-                              'ParentFederation',
-                              'Date',
-                              'MeetCountry',
-                              'MeetState',
-                              'MeetTown',
-                              'Meet'  # 'MeetName'
-                              ],
-                       usecols=['Name',
-                                'Country',
+    reader = pd.read_csv(path,
+                         header=0,
+                         index_col=False,
+                         names=['Name',
                                 'Sex',
+                                'Event',
+                                'Equipment',
                                 'Age',
-                                'Bodyweight',
-                                'WeightClass',
-                                'Date',
+                                'AgeClass',
+                                'BirthYearClass',
+                                'Division',
+                                'Bodyweight',  # 'BodyweightKg'
+                                'WeightClass',  # 'WeightClassKg'
+                                'Squat1',  # 'Squat1Kg'
+                                'Squat2',  # 'Squat2Kg'
+                                'Squat3',  # 'Squat3Kg'
+                                'Squat4',  # 'Squat4Kg'
+                                'Squat',  # 'Best3SquatKg'
+                                'Bench1',  # 'Bench1Kg'
+                                'Bench2',  # 'Bench2Kg'
+                                'Bench3',  # 'Bench3Kg'
+                                'Bench4',  # 'Bench4Kg'
+                                'Bench',  # 'Best3BenchKg'
+                                'Deadlift1',  # 'Deadlift1Kg'
+                                'Deadlift2',  # 'Deadlift2Kg'
+                                'Deadlift3',  # 'Deadlift3Kg'
+                                'Deadlift4',  # 'Deadlift4Kg'
+                                'Deadlift',  # 'Best3DeadliftKg'
+                                'Total',  # 'TotalKg'
+                                'Place',
+                                'Dots',
+                                'Wilks',
+                                'Glossbrenner',
+                                'Goodlift',
+                                'Tested',
+                                'Country',
+                                'State',
                                 'Federation',
                                 'ParentFederation',
-                                'Meet',
-                                'Event',
-                                'Equipment',
-                                'Squat1',
-                                'Squat2',
-                                'Squat3',
-                                'Squat',
-                                'Bench1',
-                                'Bench2',
-                                'Bench3',
-                                'Bench',
-                                'Deadlift1',
-                                'Deadlift2',
-                                'Deadlift3',
-                                'Deadlift',
-                                'Total',
-                                'Wilks'
+                                'Date',
+                                'MeetCountry',
+                                'MeetState',
+                                'MeetTown',
+                                'Meet'  # 'MeetName'
                                 ],
-                       dtype={'Name': 'str',
-                              'Country': 'str',
-                              'Sex': 'str',
-                              'Age': 'float',
-                              'Bodyweight': 'float',
-                              'WeightClass': 'str',
-                              'Federation': 'str',
-                              'ParentFederation': 'str',
-                              'Meet': 'str',
-                              'Event': 'str',
-                              'Equipment': 'str',
-                              'Squat1': 'float',
-                              'Squat2': 'float',
-                              'Squat3': 'float',
-                              'Squat': 'float',
-                              'Bench1': 'float',
-                              'Bench2': 'float',
-                              'Bench3': 'float',
-                              'Bench': 'float',
-                              'Deadlift1': 'float',
-                              'Deadlift2': 'float',
-                              'Deadlift3': 'float',
-                              'Deadlift': 'float',
-                              'Total': 'float',
-                              'Wilks': 'float'
-                              }
-                       )
-    # Parse dates
-    data['Date'] = pd.to_datetime(data['Date'], format='%Y-%m-%d')
+                         usecols=['Name',
+                                  'Country',
+                                  'Sex',
+                                  'Age',
+                                  'Bodyweight',
+                                  'WeightClass',
+                                  'Date',
+                                  'Federation',
+                                  'ParentFederation',
+                                  'Meet',
+                                  'Event',
+                                  'Equipment',
+                                  'Squat1',
+                                  'Squat2',
+                                  'Squat3',
+                                  'Squat',
+                                  'Bench1',
+                                  'Bench2',
+                                  'Bench3',
+                                  'Bench',
+                                  'Deadlift1',
+                                  'Deadlift2',
+                                  'Deadlift3',
+                                  'Deadlift',
+                                  'Total',
+                                  'Wilks'
+                                  ],
+                         dtype={'Name': 'str',
+                                'Country': 'str',
+                                'Sex': 'str',
+                                'Age': 'float',
+                                'Bodyweight': 'float',
+                                'WeightClass': 'str',
+                                'Federation': 'str',
+                                'ParentFederation': 'str',
+                                'Meet': 'str',
+                                'Event': 'str',
+                                'Equipment': 'str',
+                                'Squat1': 'float',
+                                'Squat2': 'float',
+                                'Squat3': 'float',
+                                'Squat': 'float',
+                                'Bench1': 'float',
+                                'Bench2': 'float',
+                                'Bench3': 'float',
+                                'Bench': 'float',
+                                'Deadlift1': 'float',
+                                'Deadlift2': 'float',
+                                'Deadlift3': 'float',
+                                'Deadlift': 'float',
+                                'Total': 'float',
+                                'Wilks': 'float'
+                                },
+                         chunksize=chunksize
+                         )
+
+    # Clean the chunks
+    for chunk in [reader] if chunksize is None else reader:
+        yield clean_chunk(chunk)
+
+
+def clean_chunk(data):
+    """
+    Perform the cleaning that does not depend on the user on a chunk of raw data. The meets of every event and Wilks
+    are kept, see filter_meets.
 
+    :param pd.DataFrame data: raw data from some meets.
+    :return: pd.DataFrame, data with the valid meets.
+    """
     # Perform some universal cleaning
-    data = data.loc[data['Event'] == 'SBD']
     data = data.loc[data['Sex'] != 'Mx']
-    data = data.loc[data['Wilks'] >= 400]
 
-    # Drop null values
-    data = data.dropna(subset=['Squat', 'Bench', 'Deadlift', 'Total'])
+    # Parse dates
+    data = data.assign(Date=pd.to_datetime(data['Date'], format='%Y-%m-%d'))
 
     return data
 
 
-def get_weight_classes(classes, sex):
+def filter_meets(data, min_wilks=settings.MIN_WILKS, events=settings.EVENTS):
     """
-    Get weight classes for a given sex and weight_classes.
+    Keep the meets of some events with a minimum Wilks and a total, which are the ones the app loads. A meet needs the
+    lifts of its event, like only the bench for a 'B' meet, the other ones are missing.
 
-    :param str classes: federation to take weight classes from. 'IPF' or 'WRPF'.
-    :param str sex: sex to take weight classes from. 'M' or 'F'.
-    :return: bins, list with weight classes to cut the bodyweight.
-    :return: labels, list with the weight classes.
+    :param pd.DataFrame data: data from some meets.
+    :param float min_wilks: minimum Wilks of the meets, 0 to keep all of them.
+    :param list events: allowed events of the meets, all of them if empty.
+    :return: pd.DataFrame, data with the meets kept.
     """
-    # Initialize values
-    bins = []
-    labels = []
+    # Filter by event and Wilks
+    if events:
+        data = data.loc[data['Event'].isin(events)]
+    if min_wilks > 0:
+        data = data.loc[data['Wilks'] >= min_wilks]
+
+    # Drop the meets without a total or a lift of their event, like the disqualified ones
+    valid = data['Total'].notna()
+    for letter, lift in EVENT_LIFTS.items():
+        valid &= ~data['Event'].str.contains(letter, regex=False, na=False) | data[lift].notna()
+    data = data.loc[valid]
 
-    # Update values
-    if classes == 'IPF':
-        if sex == 'M':
-            bins = [0.0, 59.0, 66.0, 74.0, 83.0, 93.0, 105.0, 120.0, 1000.0]
-            labels = ['59', '66', '74', '83', '93', '105', '120', '120+']
-        elif sex == 'F':
-            bins = [0.0, 47.0, 52.0, 57.0, 63.0, 72.0, 84.0, 1000.0]
-            labels = ['47', '52', '57', '63', '72', '84', '84+']
+    return data
 
-    elif classes == 'WRPF':
-        if sex == 'M':
-            bins = [0.0, 56.0, 60.0, 67.5, 75.0, 82.5, 90.0, 100.0, 110.0, 125.0, 140.0, 1000.0]
-            labels = ['56', '60', '67.5', '75', '82.5', '90', '100', '110', '125', '140', '140+']
-        elif sex == 'F':
-            bins = [0.0, 44.0, 48.0, 52.0, 56.0, 60.0, 67.5, 75.0, 82.5, 90.0, 1000.0]
-            labels = ['44', '48', '52', '56', '60', '67.5 ', '75', '82.5', '90', '90+']
 
-    return bins, labels
+def get_meet_filters(min_wilks=settings.MIN_WILKS, events=settings.EVENTS):
+    """
+    Get the conditions of filter_meets on the event and the Wilks for the parquet reader.
+
+    :param float min_wilks: minimum Wilks of the meets, 0 to keep all of them.
+    :param list events: allowed events of the meets, all of them if empty.
+    :return: list, conditions for load_from_store, None if there are none.
+    """
+    filters = []
+    if events:
+        filters.append(('Event', 'in', list(events)))
+    if min_wilks > 0:
+        filters.append(('Wilks', '>=', min_wilks))
+
+    return filters or None
 
 
-def clean_data(data, classes, equipment):
+def compact_data(data):
+    """
+    Reduce the memory of the data using categories for the text columns and single precision for the weights.
+
+    :param pd.DataFrame data: data from all the meets.
+    :return: pd.DataFrame, the same data using less memory.
+    """
+    # Obtain initial memory
+    memory = data.memory_usage(deep=True).sum()
+
+    # Encode text columns, keeping only the categories used and sorted, since the columns read as categories have
+    # the ones of every meet of the file in the order they appear
+    data = data.astype({col: 'category' for col in CATEGORY_COLUMNS if col in data})
+    for col in CATEGORY_COLUMNS:
+        if col in data:
+            values = data[col].cat.remove_unused_categories()
+            data[col] = values.cat.reorder_categories(sorted(values.cat.categories))
+
+    # Reduce precision of weights, which are multiples of 0.25 kg
+    data = data.astype({col: 'float32' for col in FLOAT32_COLUMNS if col in data})
+
+    # Report the reduction
+    logger.info('Compact data: %.1f MB -> %.1f MB', memory / 2 ** 20, data.memory_usage(deep=True).sum() / 2 ** 20)
+
+    return data
+
+
+def add_weight_classes(data):
+    """
+    Add a column with the weight class of each meet for every scheme, named 'WeightClass_<scheme>'.
+
+    :param pd.DataFrame data: data from all the meets.
+    :return: pd.DataFrame, data with the weight classes.
+    """
+    bodyweight = data['Bodyweight'].to_numpy(dtype='float64', na_value=np.nan)
+    sex = data['Sex'].to_numpy(dtype='object')
+    columns = {'WeightClass_' + classes: pd.Series(assign_weight_classes(bodyweight, sex, classes), index=data.index)
+               for classes in SCHEMES}
+
+    return data.assign(**columns)
+
+
+@instrument()
+def clean_data(data, classes, equipment, years=None):
     """
     Clean data using the filters selected by the user.
 
-    :param pd.DataFrame data: raw data from all the meets.
-    :param str classes: federation to take weight classes from. 'IPF' or 'WRPF'.
+    :param data: pd.DataFrame with data from all the meets, with the weight classes and sorted by Wilks, or backend.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
     :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
-    :return: pd.DataFrame, clean data from all the meets.
+    :param tuple years: first and last year of the meets, None to keep all of them.
+    :return: pd.DataFrame, clean data from all the meets, or backend with it for a backend.
+    """
+    return get_backend(data).clean(classes, equipment, years)
+
+
+@instrument()
+def get_best_lifts_per_weightclass(data, lift, sex, n=10):
+    """
+    Get n best lifts for weight class and sex.
+
+    :param data: pd.DataFrame with clean data from all the meets, or backend with it, from clean_data.
+    :param str sex: sex to filter. 'M' or 'F'.
+    :param str lift: lift to track.
+    :param int n: number of lifters to keep of each weight class.
+    :return: pd.DataFrame, data from n best lifts for weight class and sex.
+    """
+    return get_backend(data).best_lifts(lift, sex, n)
+
+
+def normalize_name(name):
+    """
+    Normalize a name to compare it regardless of case and spaces.
+
+    :param str name: name of a lifter or text written by the user.
+    :return: str, normalized name.
+    """
+    return ' '.join(name.casefold().split())
+
+
+def build_lifter_index(data):
+    """
+    Build the index to find the meets of a lifter without scanning all the meets.
+
+    :param pd.DataFrame data: data from all the meets.
+    :return: np.ndarray, positions of the meets sorted by name and date, from the latest meet to the first one.
+    :return: np.ndarray, where the meets of each lifter start in the sorted positions, and the number of meets last.
+    :return: np.ndarray, names of the lifters, sorted.
+    """
+    # Encode the names sorted, so the meets of each lifter are contiguous once sorted
+    codes, names = pd.factorize(data['Name'].to_numpy(dtype='object'), sort=True)
+    order = pd.DataFrame({'Code': codes, 'Date': data['Date'].to_numpy()}) \
+        .sort_values(by=['Code', 'Date'], ascending=[True, False]) \
+        .index.to_numpy(dtype='int32')
+
+    # Find where the meets of each lifter start, the meets without name are before the first one
+    starts = np.searchsorted(codes[order], np.arange(len(names) + 1))
+
+    return order, starts, names
+
+
+def build_personal_bests(data, n=MAX_LIFTERS):
+    """
+    Build the table with the best meet of each lifter for every federation, equipment, sex, weight class and lift.
+
+    Only the n best lifters of each group are kept, sorted from best to worst, so the best lifts for any number of
+    lifters up to n are a slice of the table. The table has the positions of the meets in the data, not the meets.
+
+    :param pd.DataFrame data: data from all the meets, with the weight classes.
+    :param int n: maximum number of lifters to keep of each weight class.
+    :return: dict, with keys (classes, lift) and values the np.ndarray with the positions of the meets, the meets of
+        each group contiguous, and a dict with the (start, stop) positions of each (equipment, sex, weight class) group.
     """
-    # Copy data
-    df = data.copy()
+    personal_bests = {}
+    for classes in SCHEMES:
+        df = data.assign(WeightClass=data['WeightClass_' + classes]).reset_index(drop=True)
+        df = df.dropna(subset=['WeightClass'])
+        for lift in LIFTS:
+            # Keep the best meet of each lifter and the best lifters of each group, with the groups contiguous
+            df_lift = df.dropna(subset=[lift]) \
+                .sort_values(by=lift, ascending=False, kind='stable') \
+                .drop_duplicates(subset=['Equipment', 'Sex', 'WeightClass', 'Name']) \
+                .groupby(['Equipment', 'Sex', 'WeightClass'], observed=True).head(n) \
+                .sort_values(by=['Equipment', 'Sex', 'WeightClass'], kind='stable')
+
+            # Find where each group starts and stops
+            groups = df_lift.reset_index(drop=True) \
+                .groupby(['Equipment', 'Sex', 'WeightClass'], observed=True, sort=False).indices
+            offsets = {key: (int(positions[0]), int(positions[-1]) + 1) for key, positions in groups.items()}
+            personal_bests[(classes, lift)] = (df_lift.index.to_numpy(dtype='int32'), offsets)
+
+    return personal_bests
+
+
+def build_yearly_bests(data, n=MAX_LIFTERS):
+    """
+    Build the table with the best meet of each lifter in each year for every federation, equipment, sex, weight class
+    and lift, to find the best lifts of any range of years.
 
-    # Obtain weight classes
-    men_bins, men_labels = get_weight_classes(classes=classes, sex='M')
-    women_bins, women_labels = get_weight_classes(classes=classes, sex='F')
+    Only the n best lifters of each year are kept, which is enough since the best meet of a lifter in a range of years
+    is their best meet in one of the years. The meets of each group are sorted by year, so the meets of a range of years
+    are contiguous. The table has the positions of the meets in the data, not the meets.
 
-    # Clean weight classes
-    df.loc[df['Sex'] == 'M', 'WeightClass'] = pd.cut(df.loc[df['Sex'] == 'M', 'Bodyweight'],
-                                                     bins=men_bins,
-                                                     labels=men_labels
-                                                     )
-    df.loc[df['Sex'] == 'F', 'WeightClass'] = pd.cut(df.loc[df['Sex'] == 'F', 'Bodyweight'],
-                                                     bins=women_bins,
-                                                     labels=women_labels
-                                                     )
+    :param pd.DataFrame data: data from all the meets, with the weight classes.
+    :param int n: maximum number of lifters to keep of each weight class and year.
+    :return: dict, with keys (classes, lift) and values the np.ndarray with the positions of the meets, the np.ndarray
+        with their years and a dict with the (start, stop) positions of each (equipment, sex, weight class) group.
+    """
+    yearly_bests = {}
+    for classes in SCHEMES:
+        df = data.assign(WeightClass=data['WeightClass_' + classes], Year=data['Date'].dt.year).reset_index(drop=True)
+        df = df.dropna(subset=['WeightClass', 'Year'])
+        for lift in LIFTS:
+            # Keep the best meet of each lifter and year and the best lifters of each group and year
+            df_lift = df.dropna(subset=[lift]) \
+                .sort_values(by=lift, ascending=False, kind='stable') \
+                .drop_duplicates(subset=['Equipment', 'Sex', 'WeightClass', 'Year', 'Name']) \
+                .groupby(['Equipment', 'Sex', 'WeightClass', 'Year'], observed=True).head(n) \
+                .sort_values(by=['Equipment', 'Sex', 'WeightClass', 'Year'], kind='stable')
+
+            # Find where each group starts and stops
+            groups = df_lift.reset_index(drop=True) \
+                .groupby(['Equipment', 'Sex', 'WeightClass'], observed=True, sort=False).indices
+            offsets = {key: (int(positions[0]), int(positions[-1]) + 1) for key, positions in groups.items()}
+            yearly_bests[(classes, lift)] = (df_lift.index.to_numpy(dtype='int32'),
+                                             df_lift['Year'].to_numpy(dtype='int16'), offsets)
+
+    return yearly_bests
+
+
+def build_lift_ranks(data):
+    """
+    Build the sorted bests of the lifters for every federation, equipment, sex, weight class and lift, to find the rank
+    of any result with a binary search.
+
+    :param pd.DataFrame data: data from all the meets, with the weight classes.
+    :return: dict, with keys (classes, lift) and values the np.ndarray with the best result of each lifter, sorted from
+        the worst to the best within each group, and a dict with the (start, stop) positions of each (equipment, sex,
+        weight class) group.
+    """
+    lift_ranks = {}
+    for classes in SCHEMES:
+        df = data.assign(WeightClass=data['WeightClass_' + classes])
+        for lift in LIFTS:
+            # Keep the best result of each lifter and sort them within each group
+            bests = df.groupby(['Equipment', 'Sex', 'WeightClass', 'Name'], observed=True)[lift].max() \
+                .dropna() \
+                .reset_index() \
+                .sort_values(by=['Equipment', 'Sex', 'WeightClass', lift], kind='stable', ignore_index=True)
 
-    # Filter by equipment
-    df = df.loc[df['Equipment'].isin([x for x in equipment])]
+            # Find where each group starts and stops
+            groups = bests.groupby(['Equipment', 'Sex', 'WeightClass'], observed=True, sort=False).indices
+            offsets = {key: (int(positions[0]), int(positions[-1]) + 1) for key, positions in groups.items()}
+            lift_ranks[(classes, lift)] = (bests[lift].to_numpy(), offsets)
+
+    return lift_ranks
+
+
+def get_lifter_bests(data, classes):
+    """
+    Get the best meet of each lifter for every lift.
 
-    # Sort data
-    df = df.sort_values(by='Wilks', ascending=False)
+    :param pd.DataFrame data: data with the meets of some lifters, with the weight classes.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :return: pd.DataFrame, with the lifter, the lift, the best result and the equipment, sex, weight class and date of
+        the meet of each lifter and lift.
+    """
+    df = data.assign(WeightClass=data['WeightClass_' + classes])
+    bests = []
+    for lift in LIFTS:
+        best = df.sort_values(by=lift, ascending=False, kind='stable').drop_duplicates(subset=['Name'])
+        best = best.dropna(subset=[lift])
+        bests.append(pd.DataFrame({'Name': best['Name'].astype('object'),
+                                   'Lift': lift,
+                                   'Best': best[lift],
+                                   'Equipment': best['Equipment'].astype('object'),
+                                   'Sex': best['Sex'].astype('object'),
+                                   'WeightClass': best['WeightClass'].astype('object'),
+                                   'Date': best['Date']
+                                   }))
+
+    return pd.concat(bests, ignore_index=True)
+
+
+@instrument()
+def rank_lifts(lift_ranks, bests, classes):
+    """
+    Find the rank and the percentile of results among the bests of the lifters of their equipment, sex and weight
+    class, with a binary search in the sorted bests.
+
+    :param dict lift_ranks: sorted bests of the lifters, from build_lift_ranks.
+    :param pd.DataFrame bests: results to rank, with the columns of get_lifter_bests.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :return: pd.DataFrame, the results with their rank (lifters with the same result share it), the number of lifters
+        of their group and their percentile (share of lifters with the same or a worse result).
+    """
+    ranks = np.zeros(len(bests), dtype='int64')
+    lifters = np.zeros(len(bests), dtype='int64')
+    values = bests['Best'].to_numpy()
+
+    # Search all the results of each group at once
+    groups = bests.groupby(['Lift', 'Equipment', 'Sex', 'WeightClass'], observed=True, sort=False).indices
+    for (lift, eq, sex, wc), positions in groups.items():
+        sorted_bests, offsets = lift_ranks[(classes, lift)]
+        start, stop = offsets.get((eq, sex, wc), (0, 0))
+        not_better = np.searchsorted(sorted_bests[start:stop], values[positions], side='right')
+        ranks[positions] = stop - start - not_better + 1
+        lifters[positions] = stop - start
+
+    # Results without weight class or outside the groups have no rank
+    df = bests.assign(Rank=ranks, Lifters=lifters)
+    df = df.loc[df['Lifters'] > 0]
+    df = df.assign(Percentile=100 * (df['Lifters'] - df['Rank'] + 1) / df['Lifters'])
 
     return df
 
 
-def get_best_lifts_per_weightclass(data, lift, sex, n=10):
+@instrument()
+def get_best_lifts(data, personal_bests, classes, equipment, lift, sex, n=10):
     """
-    Get n best lifts for weight class and sex.
+    Get n best lifts for weight class and sex from the table of personal bests.
 
-    :param pd.DataFrame data: raw data from all the meets.
+    :param pd.DataFrame data: data from all the meets, with the weight classes.
+    :param dict personal_bests: table with the best meet of each lifter, from build_personal_bests.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
+    :param str lift: lift to track.
     :param str sex: sex to filter. 'M' or 'F'.
+    :param int n: number of lifters to keep of each weight class.
+    :return: pd.DataFrame, data from n best lifts for weight class and sex.
+    """
+    # Take the best lifters of each weight class and equipment
+    positions, offsets = personal_bests[(classes, lift)]
+    _, weight_classes = get_weight_classes(classes=classes, sex=sex)
+    groups = [positions[start:min(stop, start + n)] for start, stop in
+              (offsets[(eq, sex, wc)] for wc in weight_classes for eq in equipment or [] if (eq, sex, wc) in offsets)]
+    if not groups:
+        return pd.DataFrame(columns=PERSONAL_BEST_COLUMNS + [lift])
+    df = take_best_lifts(data, np.concatenate(groups), classes, lift)
+
+    # Merge the equipments keeping the best meet of each lifter
+    if len(equipment) > 1:
+        df = df.sort_values(by=lift, ascending=False, kind='stable') \
+            .drop_duplicates(subset=['WeightClass', 'Name']) \
+            .groupby('WeightClass', observed=True).head(n)
+
+    return df
+
+
+def take_best_lifts(data, positions, classes, lift):
+    """
+    Take some meets of the data with the columns of the best lifts.
+
+    :param pd.DataFrame data: data from all the meets, with the weight classes.
+    :param np.ndarray positions: positions of the meets.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param str lift: lift to track.
+    :return: pd.DataFrame, the meets with the columns in PERSONAL_BEST_COLUMNS and the lift.
+    """
+    df = data.take(positions)
+    df = df.assign(WeightClass=df['WeightClass_' + classes])
+
+    return df[PERSONAL_BEST_COLUMNS + [lift]].reset_index(drop=True)
+
+
+@instrument()
+def get_best_lifts_between(data, yearly_bests, classes, equipment, lift, sex, years, n=10):
+    """
+    Get n best lifts for weight class and sex in a range of years from the table of yearly bests.
+
+    :param pd.DataFrame data: data from all the meets, with the weight classes.
+    :param dict yearly_bests: table with the best meet of each lifter in each year, from build_yearly_bests.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
     :param str lift: lift to track.
+    :param str sex: sex to filter. 'M' or 'F'.
+    :param tuple years: first and last year of the meets.
     :param int n: number of lifters to keep of each weight class.
     :return: pd.DataFrame, data from n best lifts for weight class and sex.
     """
-    # Perform the filter and the groupings
-    df = data[data['Sex'] == sex] \
-        .sort_values(by=['WeightClass', 'Name', lift], ascending=False) \
-        .groupby(['WeightClass', 'Name'], as_index=False).first() \
-        .sort_values(by=['WeightClass', lift], ascending=False) \
-        .groupby('WeightClass', as_index=False).head(n)
+    # Take the meets of the years of each weight class and equipment, which are contiguous
+    positions, year, offsets = yearly_bests[(classes, lift)]
+    _, weight_classes = get_weight_classes(classes=classes, sex=sex)
+    groups = []
+    for wc in weight_classes:
+        for eq in equipment or []:
+            start, stop = offsets.get((eq, sex, wc), (0, 0))
+            first, last = np.searchsorted(year[start:stop], [years[0], years[1] + 1]) + start
+            groups.append(positions[first:last])
+    if not groups:
+        return pd.DataFrame(columns=PERSONAL_BEST_COLUMNS + [lift])
+
+    # Merge the years and the equipments keeping the best meet of each lifter
+    df = take_best_lifts(data, np.concatenate(groups), classes, lift) \
+        .sort_values(by=lift, ascending=False, kind='stable') \
+        .drop_duplicates(subset=['WeightClass', 'Name']) \
+        .groupby('WeightClass', observed=True).head(n)
 
     return df
 
 
+@instrument()
 def get_lift_plot_per_weightclass(fig, data, lift, weight_classes, colors, row, col, showlegend=False):
     """
     Add a a lift plot the figure of lift plots.
@@ -269,13 +776,19 @@ def get_lift_plot_per_weightclass(fig, data, lift, weight_classes, colors, row,
     :param bool showlegend: flag indicating if the legend has to be shown.
     :return: Figure, fig with the plot.
     """
-    # Prepare the hovertemplate
+    # Lazy import, plotly is slow to import
+    import plotly.graph_objects as go
+
+    # Prepare the hovertemplate, rounding the numbers which may be in single precision
     title = '<b>%{hovertext}</b><br>'
-    line_1 = 'Bodyweight: %{x} kg<br>'
-    line_2 = lift + ': %{y}<br>' if (lift == 'Wilks') else lift + ': %{y} kg<br>'
+    line_1 = 'Bodyweight: %{x:.2~f} kg<br>'
+    line_2 = lift + ': %{y:.2~f}<br>' if (lift == 'Wilks') else lift + ': %{y:.2~f} kg<br>'
     line_3 = 'Date: %{customdata|%Y-%m-%d}'
     hovertemplate = title + line_1 + line_2 + line_3 + '<extra></extra>'
 
+    # Use WebGL if enabled
+    scatter = go.Scattergl if settings.WEBGL else go.Scatter
+
     # Loop over weight classes
     for i, wc in enumerate(weight_classes):
         # Filter data for each weight class
@@ -283,17 +796,17 @@ def get_lift_plot_per_weightclass(fig, data, lift, weight_classes, colors, row,
 
         # Plot data for each weight class
         fig.add_trace(
-            go.Scatter(x=df['Bodyweight'],
-                       y=df[lift],
-                       customdata=df['Date'],
-                       mode='markers',
-                       name=wc,
-                       marker=dict(color=colors[i]),
-                       hovertext=df['Name'],
-                       hovertemplate=hovertemplate,
-                       legendgroup='WeightClass',
-                       showlegend=showlegend
-                       ),
+            scatter(x=df['Bodyweight'],
+                    y=df[lift],
+                    customdata=df['Date'],
+                    mode='markers',
+                    name=wc,
+                    marker=dict(color=colors[i]),
+                    hovertext=df['Name'],
+                    hovertemplate=hovertemplate,
+                    legendgroup='WeightClass',
+                    showlegend=showlegend
+                    ),
             row=row,
             col=col
         )
@@ -307,22 +820,78 @@ def plot_best_lifts_per_weightclass(data, sex, classes, n):
 
     :param pandas.DataFrame data: data with n best lifts for weight class and sex.
     :param str sex: sex to filter. 'M' or 'F'.
-    :param str classes: federation to take weight classes from. 'IPF' or 'WRPF'.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
     :param int n: number of lifters to keep of each weight class.
     :return: Figure, fig with the plots.
     """
+    # Get best lifts
+    best_lifts = {lift: get_best_lifts_per_weightclass(data, lift=lift, sex=sex, n=n) for lift in LIFTS}
+
+    return make_best_lifts_figure(best_lifts, sex, classes)
+
+
+def plot_best_lifts(dataset, sex, classes, equipment, n, years=None):
+    """
+    Plot n best lifts for weight class and sex using the precomputed personal bests, or querying the backend.
+
+    :param dataset: Dataset or BackendDataset, data from all the meets.
+    :param str sex: sex to filter. 'M' or 'F'.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
+    :param int n: number of lifters to keep of each weight class.
+    :param tuple years: first and last year of the meets, None to take all of them.
+    :return: Figure, fig with the plots.
+    """
+    # Query the backend if the data is not loaded
+    if isinstance(dataset, BackendDataset):
+        return plot_best_lifts_per_weightclass(clean_data(dataset.backend, classes, equipment, years), sex, classes, n)
+
+    # Get best lifts, of all time or of the years
+    if years is None:
+        best_lifts = {lift: get_best_lifts(dataset.data, dataset.personal_bests, classes, equipment, lift=lift, sex=sex,
+                                           n=n)
+                      for lift in LIFTS}
+    else:
+        best_lifts = {lift: get_best_lifts_between(dataset.data, dataset.yearly_bests, classes, equipment, lift, sex,
+                                                   years, n)
+                      for lift in LIFTS}
+
+    return make_best_lifts_figure(best_lifts, sex, classes)
+
+
+def plot_best_lifts_of_both_sexes(dataset, classes, equipment, n, years=None):
+    """
+    Plot n best lifts for weight class of men and women, compacted to send them to the browser.
+
+    :param dataset: Dataset or BackendDataset, data from all the meets.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
+    :param int n: number of lifters to keep of each weight class.
+    :param tuple years: first and last year of the meets, None to take all of them.
+    :return: dict, with the figure for men as 'M' and the figure for women as 'F'.
+    """
+    return {sex: compact_figure(plot_best_lifts(dataset, sex, classes, equipment, n, years)) for sex in ['M', 'F']}
+
+
+@instrument()
+def make_best_lifts_figure(best_lifts, sex, classes):
+    """
+    Make the figure with the best lifts for weight class and sex.
+
+    :param dict best_lifts: data with n best lifts for weight class and sex of each lift.
+    :param str sex: sex of the lifters. 'M' or 'F'.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :return: Figure, fig with the plots.
+    """
     # Get weight classes
     _, weight_classes = get_weight_classes(classes=classes, sex=sex)
 
-    # Get colors
-    colors = px.colors.qualitative.Dark24
+    # Lazy import, plotly is slow to import
+    from plotly.colors import qualitative
+    from plotly.subplots import make_subplots
 
-    # Get best lifts
-    df_s = get_best_lifts_per_weightclass(data, lift='Squat', sex=sex, n=n)
-    df_b = get_best_lifts_per_weightclass(data, lift='Bench', sex=sex, n=n)
-    df_d = get_best_lifts_per_weightclass(data, lift='Deadlift', sex=sex, n=n)
-    df_t = get_best_lifts_per_weightclass(data, lift='Total', sex=sex, n=n)
-    df_w = get_best_lifts_per_weightclass(data, lift='Wilks', sex=sex, n=n)
+    # Get colors
+    colors = qualitative.Dark24
 
     # Make figure
     fig = make_subplots(rows=1,
@@ -337,7 +906,7 @@ def plot_best_lifts_per_weightclass(data, sex, classes, n):
 
     # Add plots of lifts
     fig = get_lift_plot_per_weightclass(fig,
-                                        data=df_s,
+                                        data=best_lifts['Squat'],
                                         lift='Squat',
                                         weight_classes=weight_classes,
                                         colors=colors,
@@ -346,7 +915,7 @@ def plot_best_lifts_per_weightclass(data, sex, classes, n):
                                         showlegend=True
                                         )
     fig = get_lift_plot_per_weightclass(fig,
-                                        data=df_b,
+                                        data=best_lifts['Bench'],
                                         lift='Bench',
                                         weight_classes=weight_classes,
                                         colors=colors,
@@ -355,7 +924,7 @@ def plot_best_lifts_per_weightclass(data, sex, classes, n):
                                         showlegend=False
                                         )
     fig = get_lift_plot_per_weightclass(fig,
-                                        data=df_d,
+                                        data=best_lifts['Deadlift'],
                                         lift='Deadlift',
                                         weight_classes=weight_classes,
                                         colors=colors,
@@ -364,7 +933,7 @@ def plot_best_lifts_per_weightclass(data, sex, classes, n):
                                         showlegend=False
                                         )
     fig = get_lift_plot_per_weightclass(fig,
-                                        data=df_t,
+                                        data=best_lifts['Total'],
                                         lift='Total',
                                         weight_classes=weight_classes,
                                         colors=colors,
@@ -373,7 +942,7 @@ def plot_best_lifts_per_weightclass(data, sex, classes, n):
                                         showlegend=False
                                         )
     fig = get_lift_plot_per_weightclass(fig,
-                                        data=df_w,
+                                        data=best_lifts['Wilks'],
                                         lift='Wilks',
                                         weight_classes=weight_classes,
                                         colors=colors,
@@ -385,6 +954,214 @@ def plot_best_lifts_per_weightclass(data, sex, classes, n):
     return fig
 
 
+@instrument()
+def get_population(data, equipment, sex, lift):
+    """
+    Get the bodyweight and the lift of every meet of a sex with the allowed equipment, sorted by bodyweight so a range
+    of bodyweights is a slice.
+
+    :param pd.DataFrame data: data from all the meets.
+    :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
+    :param str sex: sex to filter. 'M' or 'F'.
+    :param str lift: lift to take.
+    :return: bodyweight, np.ndarray with the bodyweight of each meet, sorted.
+    :return: values, np.ndarray with the lift of each meet.
+    """
+    # Filter the meets, dropping the ones without a valid bodyweight or lift
+    mask = data['Equipment'].isin(equipment).to_numpy() & (data['Sex'] == sex).to_numpy()
+    bodyweight = data['Bodyweight'].to_numpy(dtype='float32', na_value=np.nan)[mask]
+    values = data[lift].to_numpy(dtype='float32', na_value=np.nan)[mask]
+    valid = (bodyweight > 0) & (bodyweight <= MAX_BODYWEIGHT) & (values > 0)
+    bodyweight, values = bodyweight[valid], values[valid]
+
+    # Sort by bodyweight
+    order = np.argsort(bodyweight, kind='stable')
+
+    return bodyweight[order], values[order]
+
+
+@instrument()
+def bin_population(bodyweight, values, x_range=None, y_range=None, bins=DENSITY_BINS):
+    """
+    Count the meets in each bin of a grid of bodyweights and lifts covering a window.
+
+    :param np.ndarray bodyweight: bodyweight of each meet, sorted, from get_population.
+    :param np.ndarray values: lift of each meet, from get_population.
+    :param tuple x_range: first and last bodyweight of the window, all of them if None.
+    :param tuple y_range: first and last lift of the window, all of them if None.
+    :param tuple bins: number of bins along the bodyweight and along the lift.
+    :return: counts, np.ndarray with the number of meets of each bin, with a row per bin of the lift.
+    :return: x_edges, np.ndarray with the edges of the bins along the bodyweight.
+    :return: y_edges, np.ndarray with the edges of the bins along the lift.
+    """
+    # Take the whole population if there is no window
+    if x_range is None:
+        x_range = (bodyweight[0], bodyweight[-1]) if len(bodyweight) else (0, 1)
+    if y_range is None:
+        y_range = (values.min(), values.max()) if len(values) else (0, 1)
+    x_min, x_max = float(x_range[0]), max(float(x_range[1]), float(x_range[0]) + 1e-3)
+    y_min, y_max = float(y_range[0]), max(float(y_range[1]), float(y_range[0]) + 1e-3)
+
+    # Take the meets in the window, the ones in the range of bodyweights are a slice
+    start = np.searchsorted(bodyweight, x_min, side='left')
+    stop = np.searchsorted(bodyweight, x_max, side='right')
+    x, y = bodyweight[start:stop], values[start:stop]
+    inside = (y >= y_min) & (y <= y_max)
+    x, y = x[inside], y[inside]
+
+    # Count the meets in each bin
+    n_x, n_y = bins
+    i = np.minimum(((x - x_min) * (n_x / (x_max - x_min))).astype('intp'), n_x - 1)
+    j = np.minimum(((y - y_min) * (n_y / (y_max - y_min))).astype('intp'), n_y - 1)
+    counts = np.bincount(j * n_x + i, minlength=n_x * n_y).reshape(n_y, n_x)
+
+    return counts, np.linspace(x_min, x_max, n_x + 1), np.linspace(y_min, y_max, n_y + 1)
+
+
+@instrument()
+def plot_population(dataset, population, sex, classes, equipment, lift, n, x_range=None, y_range=None):
+    """
+    Plot the density of the meets of the whole population in a window, with the n best lifts for weight class on top.
+
+    :param Dataset dataset: data from all the meets.
+    :param tuple population: bodyweight and lift of every meet, from get_population.
+    :param str sex: sex of the lifters. 'M' or 'F'.
+    :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
+    :param str lift: lift to plot.
+    :param int n: number of lifters to show of each weight class.
+    :param tuple x_range: first and last bodyweight of the window, all of them if None.
+    :param tuple y_range: first and last lift of the window, all of them if None.
+    :return: Figure, fig with the plot.
+    """
+    # Count the meets of each bin
+    counts, x_edges, y_edges = bin_population(*population, x_range, y_range)
+
+    # Lazy import, plotly is slow to import
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+    from plotly.subplots import make_subplots
+
+    # Plot the density in logarithmic scale, leaving the empty bins blank
+    fig = make_subplots(rows=1, cols=1)
+    with np.errstate(divide='ignore'):
+        density = np.where(counts > 0, np.log10(counts), np.nan).astype('float32')
+    ticks = list(range(int(np.nanmax(density, initial=0)) + 1))
+    unit = '' if lift == 'Wilks' else ' kg'
+    fig.add_trace(
+        go.Heatmap(x=(x_edges[:-1] + x_edges[1:]) / 2,
+                   y=(y_edges[:-1] + y_edges[1:]) / 2,
+                   z=density,
+                   customdata=counts.astype(np.min_scalar_type(counts.max(initial=0))),
+                   colorscale='Greys',
+                   colorbar=dict(title='Meets', tickvals=ticks, ticktext=['{:g}'.format(10 ** t) for t in ticks]),
+                   hovertemplate='Bodyweight: %{x:.1f} kg<br>' + lift + ': %{y:.0f}' + unit +
+                                 '<br>Meets: %{customdata}<extra></extra>',
+                   showlegend=False
+                   ),
+        row=1,
+        col=1
+    )
+
+    # Add the best lifters of each weight class
+    _, weight_classes = get_weight_classes(classes=classes, sex=sex)
+    best_lifts = get_best_lifts(dataset.data, dataset.personal_bests, classes, equipment, lift=lift, sex=sex, n=n)
+    fig = get_lift_plot_per_weightclass(fig, best_lifts, lift, weight_classes, qualitative.Dark24, row=1, col=1,
+                                        showlegend=True)
+
+    # Show the window, keeping the zoom of the user until the filters change
+    fig.update_xaxes(title_text='Bodyweight (kg)', range=[x_edges[0], x_edges[-1]])
+    fig.update_yaxes(title_text=lift + unit, range=[y_edges[0], y_edges[-1]])
+    fig.update_layout(uirevision='{} {} {} {}'.format(classes, equipment, sex, lift), height=600)
+
+    return fig
+
+
+def get_zoom_window(relayout_data):
+    """
+    Get the window zoomed by the user from the changes of the layout of a plot.
+
+    :param dict relayout_data: changes of the layout, from the relayoutData of the graph.
+    :return: x_range, tuple with the first and last value of the x axis, None if it is not zoomed.
+    :return: y_range, tuple with the first and last value of the y axis, None if it is not zoomed.
+    """
+    relayout_data = relayout_data or {}
+    ranges = []
+    for axis in ['xaxis', 'yaxis']:
+        if axis + '.range[0]' in relayout_data and axis + '.range[1]' in relayout_data:
+            ranges.append((relayout_data[axis + '.range[0]'], relayout_data[axis + '.range[1]']))
+        elif axis + '.range' in relayout_data:
+            ranges.append(tuple(relayout_data[axis + '.range']))
+        else:
+            ranges.append(None)
+
+    return tuple(ranges)
+
+
+def encode_array(values, dtype):
+    """
+    Encode an array as a typed array of plotly.js, which is much smaller than a list of numbers in json.
+
+    :param values: array-like with the values.
+    :param str dtype: numpy type of the typed array, like 'float32' or 'int32'.
+    :return: dict, with the type and the base64 encoded bytes of the array.
+    """
+    array = np.ascontiguousarray(values, dtype=dtype)
+
+    return {'dtype': array.dtype.str.lstrip('<|='), 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def compact_figure(fig):
+    """
+    Encode a figure compactly to send it to the browser: the numbers of the points as typed arrays and their texts as
+    codes of a table of strings shared by all the traces, in 'strings', decoded by assets/globalstats.js.
+
+    :param go.Figure fig: figure with the plots.
+    :return: dict, compact figure.
+    """
+    strings = {}
+    data = []
+    for trace in fig.data:
+        compact = trace.to_plotly_json()
+        for key in ['x', 'y']:
+            if trace[key] is not None:
+                compact[key] = encode_array(trace[key], 'float32')
+        for key in ['hovertext', 'customdata']:
+            if trace[key] is not None:
+                values = pd.Series(trace[key])
+                if pd.api.types.is_datetime64_any_dtype(values):
+                    values = values.dt.strftime('%Y-%m-%d')
+                codes = [strings.setdefault(value, len(strings)) for value in values.astype('str')]
+                compact[key] = encode_array(codes, 'int32')
+        data.append(compact)
+
+    return dict(fig.to_plotly_json(), data=data, strings=list(strings))
+
+
+def get_warming_up_figure():
+    """
+    Get the figure shown while the data is loading.
+
+    :return: dict, figure with a message.
+    """
+    return get_message_figure('Loading the data...')
+
+
+def get_message_figure(text):
+    """
+    Get a figure with a message instead of a plot.
+
+    :param str text: message.
+    :return: dict, figure with the message.
+    """
+    return {'data': [],
+            'layout': {'annotations': [{'text': text, 'showarrow': False, 'font': {'size': 20}}],
+                       'xaxis': {'visible': False},
+                       'yaxis': {'visible': False}
+                       }
+            }
+
+
 def get_lift_evolution_plot_per_lifter(fig, data, lift, row, col):
     """
     Add a a lift plot the figure of lift plots.
@@ -396,6 +1173,9 @@ def get_lift_evolution_plot_per_lifter(fig, data, lift, row, col):
     :param int col: col position in layout of figure.
     :return: Figure, fig with the plot.
     """
+    # Lazy import, plotly is slow to import
+    import plotly.graph_objects as go
+
     # Prepare the hovertemplate
     title = '<b>%{hovertext}</b><br>'
     line_1 = 'Bodyweight: %{customdata} kg<br>'
@@ -423,15 +1203,23 @@ def plot_lift_evolution_per_lifter(data, name):
     """
     Plot evolution of the lifts for a given lifter.
 
-    :param pd.DataFrame data: data with all the meets.
+    :param data: pd.DataFrame with data with all the meets, or backend.
     :param str name: name of the lifter.
     :return: Figure, fig with the plots.
     """
-    # Filter data
-    df = data[data['Name'] == name]
+    return plot_lift_evolution(get_backend(data).lifter_meets(name))
 
-    # Sort by date
-    df = df.sort_values(by='Date', ascending=False)
+
+@instrument()
+def plot_lift_evolution(data):
+    """
+    Plot evolution of the lifts of a lifter.
+
+    :param pd.DataFrame data: data with all the meets of the lifter, sorted by date.
+    :return: Figure, fig with the plots.
+    """
+    # Lazy import, plotly is slow to import
+    from plotly.subplots import make_subplots
 
     # Make figure
     fig = make_subplots(rows=1,
@@ -446,31 +1234,31 @@ def plot_lift_evolution_per_lifter(data, name):
 
     # Add plots of lifts
     fig = get_lift_evolution_plot_per_lifter(fig,
-                                             data=df,
+                                             data=data,
                                              lift='Squat',
                                              row=1,
                                              col=1
                                              )
     fig = get_lift_evolution_plot_per_lifter(fig,
-                                             data=df,
+                                             data=data,
                                              lift='Bench',
                                              row=1,
                                              col=2
                                              )
     fig = get_lift_evolution_plot_per_lifter(fig,
-                                             data=df,
+                                             data=data,
                                              lift='Deadlift',
                                              row=1,
                                              col=3
                                              )
     fig = get_lift_evolution_plot_per_lifter(fig,
-                                             data=df,
+                                             data=data,
                                              lift='Total',
                                              row=1,
                                              col=4
                                              )
     fig = get_lift_evolution_plot_per_lifter(fig,
-                                             data=df,
+                                             data=data,
                                              lift='Wilks',
                                              row=1,
                                              col=5
@@ -483,18 +1271,23 @@ def table_meets_per_lifter(data, name):
     """
     Plot evolution of the lifts for a given lifter.
 
-    :param pd.DataFrame data: data with all the meets.
+    :param data: pd.DataFrame with data with all the meets, or backend.
     :param str name: name of the lifter.
     :return: dict, table with the data of the meets.
     """
-    # Filter data
-    df = data[data['Name'] == name]
+    return table_meets(get_backend(data).lifter_meets(name))
+
 
-    # Sort by date
-    df = df.sort_values(by='Date', ascending=False)
+@instrument()
+def table_meets(data):
+    """
+    Make the table with the meets of a lifter.
 
+    :param pd.DataFrame data: data with all the meets of the lifter, sorted by date.
+    :return: dict, table with the data of the meets.
+    """
     # Format the date
-    df['Date'] = df['Date'].astype('str')
+    df = data.assign(Date=data['Date'].astype('str'))
 
     # Order the columns
     df = df[['Date', 'Meet', 'Federation', 'ParentFederation', 'WeightClass',
@@ -508,3 +1301,333 @@ def table_meets_per_lifter(data, name):
     table = df.to_dict('records')
 
     return table
+
+
+def table_lift_ranks(data):
+    """
+    Make the table with the ranks of the best lifts of a lifter.
+
+    :param pd.DataFrame data: ranks of the best lifts, from rank_lifts.
+    :return: dict, table with the ranks.
+    """
+    df = data.assign(Date=data['Date'].astype('str'),
+                     Best=data['Best'].astype('float64').round(2),
+                     Percentile=data['Percentile'].round(1))
+
+    return df[['Lift', 'Best', 'Equipment', 'WeightClass', 'Date', 'Rank', 'Lifters', 'Percentile']].to_dict('records')
+
+
+def table_rankings(data, positions, ranks):
+    """
+    Make a page of the table of rankings.
+
+    :param pd.DataFrame data: data from all the meets.
+    :param np.ndarray positions: positions of the meets of the page.
+    :param np.ndarray ranks: rank of each meet.
+    :return: dict, table with the data of the meets.
+    """
+    # Take only the meets of the page
+    df = data.take(positions)
+    df = df.assign(Rank=ranks, Date=df['Date'].astype('str'), Bodyweight=df['Bodyweight'].astype('float64').round(2))
+
+    return df[RANKING_COLUMNS].to_dict('records')
+
+
+def join_texts(texts):
+    """
+    Join texts in a single text separated by new lines, keeping where each one starts.
+
+    :param list texts: texts in UTF-8, without new lines.
+    :return: np.ndarray, joined text in UTF-8 with a new line after each text.
+    :return: np.ndarray, where each text starts, and the length of the joined text last.
+    """
+    starts = np.cumsum([0] + [len(text) + 1 for text in texts], dtype='int64')
+    text = np.frombuffer(b''.join(text + b'\n' for text in texts), dtype='uint8')
+
+    return text, starts
+
+
+# Classes
+class Dataset:
+    """
+    Data from all the meets together with the structures precomputed from it to answer the callbacks.
+    """
+
+    def __init__(self, data, timings=None):
+        """
+        Precompute the structures.
+
+        :param pd.DataFrame data: data from all the meets, with the weight classes.
+        :param dict timings: dict to record the seconds taken to precompute each structure, if given.
+        """
+        timings = {} if timings is None else timings
+        self.data = data
+        self.version = data.attrs.get('version')
+        self.path = None
+        with timed(timings, 'build personal bests'):
+            self.personal_bests = build_personal_bests(data)
+        with timed(timings, 'build yearly bests'):
+            self.yearly_bests = build_yearly_bests(data)
+        with timed(timings, 'build lift ranks'):
+            self.lift_ranks = build_lift_ranks(data)
+        with timed(timings, 'build lifter index'):
+            self.lifter_order, self.lifter_starts, self.lifter_names = build_lifter_index(data)
+        with timed(timings, 'build name index'):
+            self.names = NameIndex(self.lifter_names)
+        with timed(timings, 'build rankings index'):
+            self.rankings = RankingIndex(data)
+
+    def save(self, path):
+        """
+        Save the data and its structures in a folder, memory mappable. The structures are arrays of positions in the
+        data and of offsets, only their small dicts are pickled.
+
+        :param str path: folder to save the files.
+        """
+        # Save the names with the sorted names of the lifter index as categories, to take them from the mapped data
+        save_columns(self.data.assign(Name=pd.Categorical(self.data['Name'], categories=self.lifter_names)),
+                     os.path.join(path, 'data'))
+        save_structures({'version': self.version,
+                         'personal_bests': self.personal_bests,
+                         'yearly_bests': self.yearly_bests,
+                         'lift_ranks': self.lift_ranks,
+                         'lifter_order': self.lifter_order,
+                         'lifter_starts': self.lifter_starts,
+                         'names': self.names,
+                         'rankings': self.rankings
+                         }, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the data and its structures saved in a folder, memory mapping them read-only.
+
+        :param str path: folder with the files.
+        :return: Dataset, the loaded dataset.
+        """
+        dataset = cls.__new__(cls)
+        dataset.path = path
+        dataset.data = load_columns(os.path.join(path, 'data'))
+        dataset.__dict__.update(load_structures(path))
+        dataset.lifter_names = dataset.data['Name'].cat.categories
+
+        return dataset
+
+    def get_lifter_positions(self, name):
+        """
+        Get the positions of the meets of a lifter in the data.
+
+        :param str name: name of the lifter.
+        :return: np.ndarray, positions of the meets, from the latest to the first one.
+        """
+        i = self.lifter_names.searchsorted(name) if isinstance(name, str) else len(self.lifter_names)
+        if i == len(self.lifter_names) or self.lifter_names[i] != name:
+            return self.lifter_order[:0]
+
+        return self.lifter_order[self.lifter_starts[i]:self.lifter_starts[i + 1]]
+
+    @instrument('Dataset.get_lifter_meets')
+    def get_lifter_meets(self, name):
+        """
+        Get the meets of a lifter.
+
+        :param str name: name of the lifter.
+        :return: pd.DataFrame, data with all the meets of the lifter, from the latest to the first one.
+        """
+        return self.data.take(self.get_lifter_positions(name))
+
+    def get_lifter_ranks(self, names, classes):
+        """
+        Get the rank and the percentile of the best lifts of some lifters, among the lifters of the same equipment, sex
+        and weight class.
+
+        :param list names: names of the lifters.
+        :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+        :return: pd.DataFrame, best result of each lifter and lift with its rank, from rank_lifts.
+        """
+        positions = [self.get_lifter_positions(name) for name in names]
+        meets = self.data.take(np.concatenate(positions) if positions else [])
+
+        return rank_lifts(self.lift_ranks, get_lifter_bests(meets, classes), classes)
+
+
+class BackendDataset:
+    """
+    Data from all the meets queried through a backend without loading it, like the duckdb one. Only the names of the
+    lifters are kept in memory, to search them. The global stats and the meets of the lifters are queried, the views
+    needing the precomputed structures of Dataset are not available.
+    """
+
+    def __init__(self, backend, version):
+        """
+        Index the names of the lifters.
+
+        :param backend: backend of the data.
+        :param str version: version of the data.
+        """
+        self.backend = backend
+        self.version = version
+        self.names = NameIndex(backend.lifter_names())
+
+    @instrument('BackendDataset.get_lifter_meets')
+    def get_lifter_meets(self, name):
+        """
+        Get the meets of a lifter.
+
+        :param str name: name of the lifter.
+        :return: pd.DataFrame, data with all the meets of the lifter, from the latest to the first one.
+        """
+        return self.backend.lifter_meets(name)
+
+
+class NameIndex:
+    """
+    Index to search lifters by the start of their name, the start of any word of their name or any part of it.
+
+    The names are kept as UTF-8 texts in arrays, with the positions where each name and word starts, so the index can
+    be memory mapped.
+    """
+
+    def __init__(self, names):
+        """
+        Sort the names and their words.
+
+        :param iterable names: names of the lifters.
+        """
+        # Sort the names by their normalized form
+        pairs = sorted((normalize_name(name).encode(), name.encode()) for name in names if isinstance(name, str))
+
+        # Join the normalized names and the names in two texts, keeping where each one starts
+        self.text, self.starts = join_texts([key for key, _ in pairs])
+        self.name_text, self.name_starts = join_texts([name for _, name in pairs])
+
+        # Sort the words of the names after the first one, to search 'last name first'
+        words = []
+        for start, (key, _) in zip(self.starts.tolist(), pairs):
+            first, *rest = key.split(b' ')
+            start += len(first) + 1
+            for word in rest:
+                words.append((word, start))
+                start += len(word) + 1
+        words.sort()
+        self.word_starts = np.array([start for _, start in words], dtype='int64')
+        self.word_stops = self.word_starts + np.array([len(word) for word, _ in words], dtype='int64')
+        self.word_names = np.searchsorted(self.starts, self.word_starts, side='right').astype('int32') - 1
+
+    def get_key(self, i):
+        """
+        Get a normalized name.
+
+        :param int i: position of the name.
+        :return: bytes, normalized name in UTF-8.
+        """
+        return self.text[self.starts[i]:self.starts[i + 1] - 1].tobytes()
+
+    def get_word(self, i):
+        """
+        Get a word of the names, after the first word of each name.
+
+        :param int i: position of the word.
+        :return: bytes, word in UTF-8.
+        """
+        return self.text[self.word_starts[i]:self.word_stops[i]].tobytes()
+
+    @instrument('NameIndex.search')
+    def search(self, query, k=MAX_SEARCH_RESULTS):
+        """
+        Search the names matching a query, first the names starting with it, then the names with a word starting with
+        it and then the names containing it.
+
+        :param str query: text written by the user.
+        :param int k: maximum number of names to return.
+        :return: list, names matching the query.
+        """
+        query = normalize_name(query or '')
+        if not query:
+            return []
+        found = []
+        n_names = len(self.starts) - 1
+        n_words = len(self.word_starts)
+
+        # Names starting with the query
+        encoded = query.encode()
+        i = bisect.bisect_left(range(n_names), encoded, key=self.get_key)
+        while i < n_names and self.get_key(i).startswith(encoded) and len(found) < k:
+            found.append(i)
+            i += 1
+
+        # Names with a word starting with the first word of the query and containing the rest of the words
+        first, *rest = encoded.split()
+        i = bisect.bisect_left(range(n_words), first, key=self.get_word)
+        while i < n_words and self.get_word(i).startswith(first) and len(found) < k:
+            j = int(self.word_names[i])
+            if j not in found and all(word in self.get_key(j) for word in rest):
+                found.append(j)
+            i += 1
+
+        # Names containing the query, searched in the text with all the names
+        if len(query) >= MIN_SUBSTRING_SEARCH:
+            pattern = re.compile(re.escape(encoded))
+            match = pattern.search(self.text)
+            while match is not None and len(found) < k:
+                j = int(np.searchsorted(self.starts, match.start(), side='right')) - 1
+                if j not in found:
+                    found.append(j)
+                match = pattern.search(self.text, int(self.starts[j + 1]))
+
+        return [self.name_text[self.name_starts[j]:self.name_starts[j + 1] - 1].tobytes().decode() for j in found]
+
+
+class RankingIndex:
+    """
+    Index to rank the lifters by any lift, with the meets sorted from the best to the worst result of each lift and
+    the values of the filters encoded as integers.
+    """
+
+    def __init__(self, data):
+        """
+        Sort the meets by each lift and encode the lifters and the values of the filters.
+
+        :param pd.DataFrame data: data from all the meets.
+        """
+        # Sort the meets by each lift, without the meets missing it, so they are not ranked in any order
+        self.orders = {}
+        for lift in LIFTS:
+            values = data[lift].to_numpy(dtype='float64', na_value=np.nan)
+            order = np.argsort(-values, kind='stable')
+            self.orders[lift] = order[~np.isnan(values[order])].astype('int32')
+
+        # Encode the lifters and the values of the filters
+        self.lifters = pd.factorize(data['Name'])[0].astype('int32')
+        self.codes = {}
+        self.values = {}
+        for col in RANKING_FILTERS:
+            codes, values = pd.factorize(data[col], sort=True)
+            self.codes[col] = codes.astype('int16')
+            self.values[col] = list(values)
+
+    def rank(self, lift, filters=None):
+        """
+        Rank the lifters by a lift, taking the best meet of each lifter among the meets matching the filters.
+
+        :param str lift: lift to rank by.
+        :param dict filters: allowed values of some of the columns in RANKING_FILTERS, with the column as key. A column
+            without values is not filtered.
+        :return: np.ndarray, positions of the best meet of each lifter, from the best to the worst.
+        """
+        # Select the meets matching the filters
+        positions = self.orders[lift]
+        mask = None
+        for col, values in (filters or {}).items():
+            if values:
+                codes = [self.values[col].index(value) for value in values if value in self.values[col]]
+                selected = np.isin(self.codes[col], codes)
+                mask = selected if mask is None else mask & selected
+        if mask is not None:
+            positions = positions[mask[positions]]
+
+        # Keep the best meet of each lifter, which is the first one
+        _, first = np.unique(self.lifters[positions], return_index=True)
+
+        return positions[np.sort(first)]
+
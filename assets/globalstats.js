@@ -0,0 +1,54 @@
+// Constructors of the typed arrays encoded by plotly as {dtype, bdata}
+var TYPED_ARRAYS = {
+    'f8': Float64Array, 'f4': Float32Array,
+    'i4': Int32Array, 'i2': Int16Array, 'i1': Int8Array,
+    'u4': Uint32Array, 'u2': Uint16Array, 'u1': Uint8Array
+};
+
+// Take the first n values of an array of a trace, decoding it first if it is a typed array
+function sliceArray(values, n) {
+    if (values && values.bdata !== undefined) {
+        var binary = atob(values.bdata);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new TYPED_ARRAYS[values.dtype](bytes.buffer).slice(0, n);
+    }
+    return Array.isArray(values) ? values.slice(0, n) : values;
+}
+
+// Keep the first n points of every trace of a figure, which are the n best lifters of each weight class. The texts of
+// a compact figure are codes of its table of strings, which are replaced by the strings
+function sliceFigure(figure, n) {
+    var strings = figure.strings;
+    var data = (figure.data || []).map(function (trace) {
+        var sliced = Object.assign({}, trace);
+        ['x', 'y', 'customdata', 'hovertext'].forEach(function (key) {
+            if (key in trace) {
+                sliced[key] = sliceArray(trace[key], n);
+                if (strings && (key === 'customdata' || key === 'hovertext')) {
+                    sliced[key] = Array.prototype.map.call(sliced[key], function (code) {
+                        return strings[code];
+                    });
+                }
+            }
+        });
+        return sliced;
+    });
+    var sliced = Object.assign({}, figure, {data: data});
+    delete sliced.strings;
+    return sliced;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    globalstats: {
+        // Plot the n best lifters of each weight class from the figures with the best ones, without asking the server
+        sliceTop: function (n, figures) {
+            if (!figures) {
+                return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+            }
+            return [sliceFigure(figures.M, n), sliceFigure(figures.F, n)];
+        }
+    }
+});
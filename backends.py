@@ -0,0 +1,284 @@
+# Imports
+import copy
+import pandas as pd
+import settings
+from weight_classes import MAX_BODYWEIGHT, get_weight_classes, assign_weight_classes
+
+# Constants
+# Lift of each letter of the events, like 'SBD' or 'B'
+EVENT_LIFTS = {'S': 'Squat', 'B': 'Bench', 'D': 'Deadlift'}
+
+# Columns of the meets of a lifter used by the plots and the tables of the lifter
+MEET_COLUMNS = ['Name', 'Date', 'Meet', 'Federation', 'ParentFederation', 'WeightClass', 'Bodyweight',
+                'Squat1', 'Squat2', 'Squat3', 'Squat',
+                'Bench1', 'Bench2', 'Bench3', 'Bench',
+                'Deadlift1', 'Deadlift2', 'Deadlift3', 'Deadlift',
+                'Total', 'Wilks'
+                ]
+
+
+# Classes
+class PandasBackend:
+    """
+    Queries of the data of a dataframe in memory, the default backend. The meets are filtered when the dataframe is
+    loaded, see load_data and filter_meets.
+    """
+
+    def __init__(self, data):
+        """
+        Initialize the backend.
+
+        :param pd.DataFrame data: data from the meets.
+        """
+        self.data = data
+
+    def clean(self, classes, equipment, years=None):
+        """
+        Filter the meets by equipment and years and set their weight class.
+
+        :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+        :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
+        :param tuple years: first and last year of the meets, None to keep all of them.
+        :return: pd.DataFrame, clean data from the meets.
+        """
+        data = self.data
+
+        # Obtain weight classes if they are not precomputed
+        if 'WeightClass_' + classes not in data:
+            bodyweight = data['Bodyweight'].to_numpy(dtype='float64', na_value=float('nan'))
+            weight_classes = assign_weight_classes(bodyweight, data['Sex'].to_numpy(dtype='object'), classes)
+            data = data.assign(**{'WeightClass_' + classes: pd.Series(weight_classes, index=data.index)})
+
+        # Filter by equipment
+        df = data.loc[data['Equipment'].isin(equipment)]
+
+        # Filter by date
+        if years is not None:
+            df = df.loc[df['Date'].dt.year.between(*years)]
+
+        # Use the weight classes of the federation
+        df = df.assign(WeightClass=df['WeightClass_' + classes])
+
+        return df
+
+    def best_lifts(self, lift, sex, n=10):
+        """
+        Get n best lifts for weight class and sex, keeping the best meet of each lifter.
+
+        :param str lift: lift to track.
+        :param str sex: sex to filter. 'M' or 'F'.
+        :param int n: number of lifters to keep of each weight class.
+        :return: pd.DataFrame, data from n best lifts for weight class and sex.
+        """
+        # Perform the filter and the groupings
+        df = self.data[self.data['Sex'] == sex] \
+            .dropna(subset=[lift]) \
+            .sort_values(by=['WeightClass', 'Name', lift], ascending=False) \
+            .groupby(['WeightClass', 'Name'], as_index=False, observed=True).first() \
+            .sort_values(by=['WeightClass', lift], ascending=False) \
+            .groupby('WeightClass', as_index=False).head(n)
+
+        return df
+
+    def lifter_meets(self, name):
+        """
+        Get the meets of a lifter.
+
+        :param str name: name of the lifter.
+        :return: pd.DataFrame, data with all the meets of the lifter, from the latest to the first one.
+        """
+        # Filter data
+        df = self.data[self.data['Name'] == name]
+
+        # Sort by date
+        df = df.sort_values(by='Date', ascending=False)
+
+        return df
+
+    def lifter_names(self):
+        """
+        Get the names of the lifters.
+
+        :return: np.ndarray, names of the lifters, once each.
+        """
+        return self.data['Name'].dropna().unique()
+
+
+class DuckDBBackend:
+    """
+    Queries of the data of a parquet file run by DuckDB without loading the file. The queries are lazy until a result
+    is asked for, and DuckDB pushes their filters and columns down to the scan of the file, so only the row groups and
+    columns needed are read, and it spills to disk what does not fit in memory. Every query is limited to the meets
+    passing the filters of the settings, like filter_meets. Each query runs in its own cursor, so the backend can be
+    used by several threads.
+    """
+
+    def __init__(self, path, min_wilks=settings.MIN_WILKS, events=settings.EVENTS):
+        """
+        Initialize the backend.
+
+        :param str path: path to the parquet file with the data.
+        :param float min_wilks: minimum Wilks of the meets, 0 to take all of them.
+        :param list events: allowed events of the meets, like 'SBD' or 'B', all of them if empty.
+        """
+        # Lazy import, duckdb is an optional dependency
+        import duckdb
+
+        self.connection = duckdb.connect()
+
+        # Filter by event and Wilks
+        conditions = []
+        self.params = []
+        if min_wilks > 0:
+            conditions.append('Wilks >= ?')
+            self.params.append(min_wilks)
+        if events:
+            conditions.append('Event IN ({})'.format(placeholders(events)))
+            self.params += list(events)
+
+        # Drop the meets without a total or a lift of their event, like the disqualified ones
+        conditions.append('Total IS NOT NULL')
+        conditions += ["(coalesce(strpos(Event, '{}'), 0) = 0 OR {} IS NOT NULL)".format(letter, quote_identifier(lift))
+                       for letter, lift in EVENT_LIFTS.items()]
+        self.query = 'SELECT * FROM read_parquet({}) WHERE {}'.format(quote_literal(path), ' AND '.join(conditions))
+
+    def derive(self, query, params):
+        """
+        Make a backend whose data is the result of a query of the data of this one.
+
+        :param str query: query, with '{data}' in place of the data of this backend.
+        :param list params: values of the parameters of the query after the ones of the data.
+        :return: DuckDBBackend, backend with the result of the query.
+        """
+        backend = copy.copy(self)
+        backend.query = query.format(data='({})'.format(self.query))
+        backend.params = self.params + list(params)
+
+        return backend
+
+    def fetch(self, query='SELECT * FROM {data}', params=()):
+        """
+        Run a query of the data and get its result.
+
+        :param str query: query, with '{data}' in place of the data of this backend.
+        :param list params: values of the parameters of the query after the ones of the data.
+        :return: pd.DataFrame, result of the query.
+        """
+        backend = self.derive(query, params)
+
+        return self.connection.cursor().execute(backend.query, backend.params).df()
+
+    def clean(self, classes, equipment, years=None):
+        """
+        Filter the meets by equipment and years and set their weight class, lazily.
+
+        :param str classes: scheme of weight classes, like 'IPF' or 'WRPF'.
+        :param list equipment: allowed equipment for the meets. 'Raw', 'Wraps', 'Single-ply' or 'Multi-ply'.
+        :param tuple years: first and last year of the meets, None to keep all of them.
+        :return: DuckDBBackend, backend with the clean data from the meets.
+        """
+        equipment = list(equipment or [])
+        conditions = ['Equipment IN ({})'.format(placeholders(equipment)) if equipment else 'FALSE']
+        params = equipment
+        if years is not None:
+            conditions.append('Date >= CAST(? AS TIMESTAMP) AND Date < CAST(? AS TIMESTAMP)')
+            params += ['{}-01-01'.format(years[0]), '{}-01-01'.format(years[1] + 1)]
+
+        return self.derive('SELECT * REPLACE ({} AS WeightClass) FROM {{data}} WHERE {}'.format(
+            weight_class_sql(classes), ' AND '.join(conditions)), params)
+
+    def best_lifts(self, lift, sex, n=10):
+        """
+        Get n best lifts for weight class and sex, keeping the best meet of each lifter.
+
+        :param str lift: lift to track.
+        :param str sex: sex to filter. 'M' or 'F'.
+        :param int n: number of lifters to keep of each weight class.
+        :return: pd.DataFrame, data from n best lifts for weight class and sex.
+        """
+        lift = quote_identifier(lift)
+        query = 'SELECT * FROM (' \
+                'SELECT * FROM {{data}} WHERE Sex = ? AND WeightClass IS NOT NULL AND {lift} IS NOT NULL ' \
+                'QUALIFY row_number() OVER (PARTITION BY WeightClass, Name ORDER BY {lift} DESC) = 1) ' \
+                'QUALIFY row_number() OVER (PARTITION BY WeightClass ORDER BY {lift} DESC) <= ? ' \
+                'ORDER BY WeightClass DESC, {lift} DESC'.format(lift=lift)
+
+        return self.fetch(query, [sex, n])
+
+    def lifter_meets(self, name):
+        """
+        Get the meets of a lifter, reading only the columns shown.
+
+        :param str name: name of the lifter.
+        :return: pd.DataFrame, data with all the meets of the lifter, from the latest to the first one.
+        """
+        columns = ', '.join(quote_identifier(col) for col in MEET_COLUMNS)
+
+        return self.fetch('SELECT {} FROM {{data}} WHERE Name = ? ORDER BY Date DESC'.format(columns), [name])
+
+    def lifter_names(self):
+        """
+        Get the names of the lifters, reading only the column of the names.
+
+        :return: np.ndarray, names of the lifters, once each.
+        """
+        return self.fetch('SELECT DISTINCT Name FROM {data} WHERE Name IS NOT NULL')['Name'].to_numpy()
+
+
+# Functions
+def get_backend(data):
+    """
+    Get the backend answering the queries of some data.
+
+    :param data: pd.DataFrame with the data, or backend.
+    :return: backend of the data, the pandas one for a dataframe.
+    """
+    return PandasBackend(data) if isinstance(data, pd.DataFrame) else data
+
+
+def placeholders(values):
+    """
+    Make the placeholders of the parameters of a list of values in a query.
+
+    :param list values: values.
+    :return: str, placeholders separated by commas.
+    """
+    return ', '.join(['?'] * len(values))
+
+
+def quote_identifier(name):
+    """
+    Quote the name of a column in a query.
+
+    :param str name: name of the column.
+    :return: str, quoted name.
+    """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def quote_literal(text):
+    """
+    Quote a text as a literal in a query.
+
+    :param str text: text.
+    :return: str, quoted text.
+    """
+    return "'{}'".format(text.replace("'", "''"))
+
+
+def weight_class_sql(classes):
+    """
+    Make the expression of a query assigning the weight class of a scheme to each meet, like assign_weight_classes.
+
+    :param str classes: name of the scheme of weight classes.
+    :return: str, expression of the weight class, NULL if the bodyweight or the sex are not valid.
+    """
+    cases = []
+    for sex in ['M', 'F']:
+        bounds, labels = get_weight_classes(classes, sex)
+        cases += ["WHEN Sex = '{}' AND Bodyweight <= {:g} THEN '{}'".format(sex, bound, label)
+                  for bound, label in zip(bounds, labels)]
+        cases.append("WHEN Sex = '{}' THEN '{}'".format(sex, labels[-1]))
+
+    return 'CASE WHEN Bodyweight > 0 AND Bodyweight <= {:g} THEN CASE {} END END'.format(MAX_BODYWEIGHT,
+                                                                                          ' '.join(cases))
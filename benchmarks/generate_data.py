@@ -0,0 +1,246 @@
+# Imports
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+# Define some global variables
+# Version of the generated data, in the name of the csvs kept by the benchmarks so they are generated again if it
+# changes
+version = 2
+columns = ['Name', 'Sex', 'Event', 'Equipment', 'Age', 'AgeClass', 'BirthYearClass', 'Division',
+           'BodyweightKg', 'WeightClassKg',
+           'Squat1Kg', 'Squat2Kg', 'Squat3Kg', 'Squat4Kg', 'Best3SquatKg',
+           'Bench1Kg', 'Bench2Kg', 'Bench3Kg', 'Bench4Kg', 'Best3BenchKg',
+           'Deadlift1Kg', 'Deadlift2Kg', 'Deadlift3Kg', 'Deadlift4Kg', 'Best3DeadliftKg',
+           'TotalKg', 'Place', 'Dots', 'Wilks', 'Glossbrenner', 'Goodlift', 'Tested',
+           'Country', 'State', 'Federation', 'ParentFederation', 'Date', 'MeetCountry', 'MeetState', 'MeetTown', 'MeetName'
+           ]
+first_names = ['James', 'John', 'Robert', 'Michael', 'William', 'David', 'Richard', 'Joseph', 'Thomas', 'Charles',
+               'Daniel', 'Matthew', 'Anthony', 'Mark', 'Steven', 'Paul', 'Andrew', 'Joshua', 'Kevin', 'Brian',
+               'Mary', 'Patricia', 'Jennifer', 'Linda', 'Elizabeth', 'Barbara', 'Susan', 'Jessica', 'Sarah', 'Karen',
+               'Lisa', 'Nancy', 'Sandra', 'Ashley', 'Emily', 'Donna', 'Michelle', 'Amanda', 'Melissa', 'Laura']
+last_syllables = ['an', 'ber', 'cal', 'dor', 'en', 'fer', 'gan', 'har', 'is', 'jon', 'kel', 'lan', 'mor', 'nel', 'o',
+                  'per', 'qui', 'ros', 'son', 'ter', 'u', 'vin', 'wal', 'xen', 'yor', 'zan']
+federations = [('USAPL', None, 'USA'), ('IPF', 'IPF', None), ('USPA', 'IPL', 'USA'), ('WRPF', 'WRPF', 'Russia'),
+               ('BP', 'IPF', 'UK'), ('CPU', 'IPF', 'Canada'), ('AEP', 'IPF', 'Spain'), ('RPS', None, 'USA'),
+               ('SPF', None, 'USA'), ('GPC', 'GPC', 'Australia'), ('NASA', None, 'USA'), ('THSPA', None, 'USA')]
+federation_weights = [0.30, 0.12, 0.10, 0.08, 0.07, 0.07, 0.05, 0.05, 0.05, 0.04, 0.04, 0.03]
+equipments = ['Raw', 'Single-ply', 'Wraps', 'Multi-ply', 'Unlimited', 'Straps']
+equipment_weights = [0.60, 0.20, 0.13, 0.05, 0.01, 0.01]
+events = ['SBD', 'B', 'BD', 'D', 'SB', 'S']
+event_weights = [0.70, 0.17, 0.06, 0.04, 0.02, 0.01]
+wilks_coefficients = {'M': [-216.0475144, 16.2606339, -0.002388645, -0.00113732, 7.01863e-06, -1.291e-08],
+                      'F': [594.31747775582, -27.23842536447, 0.82112226871, -0.00930733913, 4.731582e-05, -9.054e-08]}
+
+
+# Functions
+def get_wilks(total, bodyweight, sex):
+    """
+    Compute the Wilks score of a total.
+
+    :param np.ndarray total: totals in kg.
+    :param np.ndarray bodyweight: bodyweights in kg.
+    :param np.ndarray sex: sexes, 'M' or 'F'.
+    :return: np.ndarray, Wilks scores.
+    """
+    x = np.clip(bodyweight, 40, 200)
+    coefficients = np.where((sex == 'M')[:, None], wilks_coefficients['M'], wilks_coefficients['F'])
+    denominator = sum(coefficients[:, i] * x ** i for i in range(6))
+
+    return total * 500 / denominator
+
+
+def get_attempts(rng, best, misses=0.15):
+    """
+    Make the three attempts of a lift ending at its best, with some missed first and second attempts as negative
+    weights.
+
+    :param np.random.Generator rng: random generator.
+    :param np.ndarray best: best lift of each meet.
+    :param float misses: probability of missing the first or second attempt.
+    :return: list, three np.ndarray with the attempts.
+    """
+    first = np.round(best * 0.9 / 2.5) * 2.5
+    second = np.round(best * 0.95 / 2.5) * 2.5
+    attempts = [np.where(rng.random(len(best)) < misses, -attempt, attempt) for attempt in [first, second]]
+
+    return attempts + [best]
+
+
+def generate_lifters(rng, n_lifters):
+    """
+    Generate the lifters, with their sex, strength and country.
+
+    :param np.random.Generator rng: random generator.
+    :param int n_lifters: number of lifters.
+    :return: pd.DataFrame, one row per lifter.
+    """
+    # Names, disambiguated with a number like openpowerlifting.org does
+    first = rng.choice(first_names, n_lifters)
+    syllables = np.array(last_syllables)[rng.integers(0, len(last_syllables), (n_lifters, 3))]
+    syllables[rng.random(n_lifters) < 0.5, 2] = ''
+    last = np.char.capitalize(np.char.add(np.char.add(syllables[:, 0], syllables[:, 1]), syllables[:, 2]))
+    names = pd.Series(np.char.add(np.char.add(first, ' '), last))
+    duplicates = names.groupby(names).cumcount()
+    names = names.where(duplicates == 0, names + ' #' + (duplicates + 1).astype(str))
+
+    # Sex follows the first name
+    sex = np.where(np.isin(first, first_names[:20]), 'M', 'F')
+
+    return pd.DataFrame({'Name': names,
+                         'Sex': sex,
+                         'Strength': rng.normal(330, 55, n_lifters),
+                         'Popularity': rng.lognormal(0, 1, n_lifters),
+                         'Bodyweight': np.where(sex == 'M', rng.normal(88, 18, n_lifters), rng.normal(68, 14, n_lifters)),
+                         'BirthYear': rng.integers(1940, 2008, n_lifters),
+                         'Country': rng.choice(['USA', 'UK', 'Canada', 'Russia', 'Australia', 'Spain', None],
+                                               n_lifters, p=[0.45, 0.1, 0.1, 0.08, 0.07, 0.05, 0.15])
+                         })
+
+
+def generate_meets(rng, n_meets):
+    """
+    Generate the meets, with their federation and date.
+
+    :param np.random.Generator rng: random generator.
+    :param int n_meets: number of meets.
+    :return: pd.DataFrame, one row per meet.
+    """
+    federation = rng.choice(len(federations), n_meets, p=federation_weights)
+    size = rng.lognormal(0, 1.2, n_meets)
+    days = (rng.beta(4, 1.3, n_meets) * (pd.Timestamp('2024-12-31') - pd.Timestamp('1970-01-01')).days).astype(int)
+
+    return pd.DataFrame({'MeetName': ['Meet {}'.format(i) for i in range(n_meets)],
+                         'Federation': [federations[i][0] for i in federation],
+                         'ParentFederation': [federations[i][1] for i in federation],
+                         'MeetCountry': [federations[i][2] or 'Sweden' for i in federation],
+                         'Size': size,
+                         'Date': pd.Timestamp('1970-01-01') + pd.to_timedelta(days, unit='D')
+                         })
+
+
+def generate_chunk(rng, lifters, meets, size):
+    """
+    Generate a chunk of entries with the columns of the csv of openpowerlifting.org.
+
+    :param np.random.Generator rng: random generator.
+    :param pd.DataFrame lifters: lifters, from generate_lifters.
+    :param pd.DataFrame meets: meets, from generate_meets.
+    :param int size: number of entries.
+    :return: pd.DataFrame, entries of the chunk.
+    """
+    # Popular lifters and meets have many more entries than the rest
+    lifter = lifters.iloc[rng.choice(len(lifters), size, p=lifters['Popularity'] / lifters['Popularity'].sum())]
+    meet = meets.iloc[rng.choice(len(meets), size, p=meets['Size'] / meets['Size'].sum())]
+    lifter = lifter.reset_index(drop=True)
+    meet = meet.reset_index(drop=True)
+    sex = lifter['Sex'].to_numpy()
+
+    # Lifts, split from a total that follows the strength of the lifter
+    bodyweight = np.round(np.clip(lifter['Bodyweight'].to_numpy() + rng.normal(0, 2, size), 35, 220), 1)
+    wilks = lifter['Strength'].to_numpy() + rng.normal(0, 20, size)
+    total = wilks / get_wilks(np.ones(size), bodyweight, sex)
+    shares = np.where((sex == 'M')[:, None], [0.36, 0.24, 0.40], [0.35, 0.20, 0.45]) + rng.normal(0, 0.02, (size, 3))
+    lifts = np.round(total[:, None] * shares / 2.5) * 2.5
+    squat, bench, deadlift = lifts.T
+
+    # Some lifters bomb out of a lift
+    bombed = rng.random((size, 3)) < 0.01
+    squat, bench, deadlift = [np.where(bombed[:, i], np.nan, lift) for i, lift in enumerate([squat, bench, deadlift])]
+    total = squat + bench + deadlift
+
+    # Other columns
+    equipment = rng.choice(equipments, size, p=equipment_weights)
+    event = rng.choice(events, size, p=event_weights)
+    age = np.clip(meet['Date'].dt.year.to_numpy() - lifter['BirthYear'].to_numpy(), 14, 90).astype(float)
+    squat_attempts = get_attempts(rng, squat)
+    bench_attempts = get_attempts(rng, bench)
+    deadlift_attempts = get_attempts(rng, deadlift)
+
+    df = pd.DataFrame({'Name': lifter['Name'],
+                       'Sex': sex,
+                       'Event': event,
+                       'Equipment': equipment,
+                       'Age': age,
+                       'AgeClass': None,
+                       'BirthYearClass': None,
+                       'Division': rng.choice(['Open', 'Juniors', 'Masters 1', 'Teen 2'], size, p=[0.6, 0.2, 0.15, 0.05]),
+                       'BodyweightKg': bodyweight,
+                       'WeightClassKg': None,
+                       'Squat1Kg': squat_attempts[0],
+                       'Squat2Kg': squat_attempts[1],
+                       'Squat3Kg': squat_attempts[2],
+                       'Squat4Kg': None,
+                       'Best3SquatKg': squat,
+                       'Bench1Kg': bench_attempts[0],
+                       'Bench2Kg': bench_attempts[1],
+                       'Bench3Kg': bench_attempts[2],
+                       'Bench4Kg': None,
+                       'Best3BenchKg': bench,
+                       'Deadlift1Kg': deadlift_attempts[0],
+                       'Deadlift2Kg': deadlift_attempts[1],
+                       'Deadlift3Kg': deadlift_attempts[2],
+                       'Deadlift4Kg': None,
+                       'Best3DeadliftKg': deadlift,
+                       'TotalKg': total,
+                       'Place': np.where(np.isnan(total), 'DQ', '1'),
+                       'Dots': None,
+                       'Wilks': np.round(get_wilks(total, bodyweight, sex), 2),
+                       'Glossbrenner': None,
+                       'Goodlift': None,
+                       'Tested': rng.choice(['Yes', None], size),
+                       'Country': lifter['Country'],
+                       'State': None,
+                       'Federation': meet['Federation'],
+                       'ParentFederation': meet['ParentFederation'],
+                       'Date': meet['Date'].dt.strftime('%Y-%m-%d'),
+                       'MeetCountry': meet['MeetCountry'],
+                       'MeetState': None,
+                       'MeetTown': None,
+                       'MeetName': meet['MeetName']
+                       })
+
+    # Lifts not done in the event are empty, and the total and the Wilks only count the ones done, like in the csv of
+    # openpowerlifting.org
+    total = np.zeros(size)
+    for lift, letter in [('Squat', 'S'), ('Bench', 'B'), ('Deadlift', 'D')]:
+        done = pd.Series(event).str.contains(letter).to_numpy()
+        df.loc[~done, [lift + '1Kg', lift + '2Kg', lift + '3Kg', 'Best3' + lift + 'Kg']] = np.nan
+        total += np.where(done, df['Best3' + lift + 'Kg'].to_numpy(dtype='float64'), 0)
+    df['TotalKg'] = total
+    df['Place'] = np.where(np.isnan(total), 'DQ', '1')
+    df['Wilks'] = np.round(get_wilks(total, bodyweight, sex), 2)
+
+    return df[columns]
+
+
+def generate_data(path, rows, seed=0, chunk_size=500000):
+    """
+    Generate a csv with the columns of the csv of openpowerlifting.org and realistic skew in lifters, meets, federations
+    and equipment. The same seed and rows always give the same csv.
+
+    :param str path: path to the csv.
+    :param int rows: number of entries.
+    :param int seed: seed of the random generator.
+    :param int chunk_size: entries generated at once, to bound the memory.
+    """
+    rng = np.random.default_rng(seed)
+    lifters = generate_lifters(rng, max(rows // 4, 1))
+    meets = generate_meets(rng, max(rows // 150, 1))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    for start in range(0, rows, chunk_size):
+        chunk = generate_chunk(rng, lifters, meets, min(chunk_size, rows - start))
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+if __name__ == '__main__':
+    # Parse arguments
+    parser = argparse.ArgumentParser(description='Generate a synthetic csv shaped like the openpowerlifting.org one.')
+    parser.add_argument('path', help='path to the csv')
+    parser.add_argument('--rows', type=int, default=100000, help='number of entries')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random generator')
+    args = parser.parse_args()
+
+    generate_data(args.path, args.rows, args.seed)
@@ -0,0 +1,450 @@
+# Imports
+import argparse
+import datetime
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import settings
+from run_benchmarks import default_data_dir, get_csv, make_store
+
+# Define some global variables
+list_equipment = ['Raw', 'Wraps', 'Single-ply', 'Multi-ply']
+list_classes = ['IPF', 'WRPF']
+first_year = 1964
+last_year = datetime.date.today().year
+
+# Upper bounds in ms of the buckets of the latency histograms
+buckets = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float('inf')]
+
+# Default share of the users doing each scenario
+default_mix = {'equipment': 0.3, 'years': 0.25, 'search': 0.3, 'population': 0.15}
+
+
+# Functions
+def get_request_body(outputs, inputs, state=(), changed=()):
+    """
+    Get the body of a request to the endpoint of the callbacks, like the one sent by the browser.
+
+    :param list outputs: outputs of the callback, as 'id.property'.
+    :param list inputs: inputs of the callback, as (id, property, value).
+    :param list state: states of the callback, as (id, property, value).
+    :param list changed: inputs that triggered the callback, as 'id.property'.
+    :return: dict, body of the request.
+    """
+    outs = [dict(zip(['id', 'property'], output.split('.'))) for output in outputs]
+
+    return {'output': outputs[0] if len(outputs) == 1 else '..' + '...'.join(outputs) + '..',
+            'outputs': outs[0] if len(outs) == 1 else outs,
+            'inputs': [{'id': i, 'property': p, 'value': v} for i, p, v in inputs],
+            'state': [{'id': i, 'property': p, 'value': v} for i, p, v in state],
+            'changedPropIds': list(changed)
+            }
+
+
+def globalstats_request(classes, equipment, changed, years=(first_year, last_year)):
+    """
+    Get the request of the callback plotting the best lifts. The number of lifters is taken in the browser.
+
+    :param str classes: scheme of weight classes.
+    :param list equipment: allowed equipment for the meets.
+    :param str changed: input that triggered the callback, as 'id.property'.
+    :param tuple years: first and last year of the meets.
+    :return: tuple, name of the callback and body of the request.
+    """
+    body = get_request_body(['globalstats-store.data'],
+                            [('globalstats-dropdown-weight_classes', 'value', classes),
+                             ('globalstats-dropdown-equipment', 'value', equipment),
+                             ('globalstats-slider-years', 'value', list(years)),
+                             ('warmup-interval', 'disabled', True)],
+                            changed=[changed])
+
+    return 'store_globalstats_graphs', body
+
+
+def population_request(classes, equipment, sex, lift, changed, relayout_data=None):
+    """
+    Get the request of the callback plotting the population.
+
+    :param str classes: scheme of weight classes.
+    :param list equipment: allowed equipment for the meets.
+    :param str sex: sex of the lifters.
+    :param str lift: lift to plot.
+    :param str changed: input that triggered the callback, as 'id.property'.
+    :param dict relayout_data: changes of the layout of the plot, with the window zoomed by the user.
+    :return: tuple, name of the callback and body of the request.
+    """
+    body = get_request_body(['population-graph.figure'],
+                            [('population-dropdown-weight_classes', 'value', classes),
+                             ('population-dropdown-equipment', 'value', equipment),
+                             ('population-dropdown-sex', 'value', sex),
+                             ('population-dropdown-lift', 'value', lift),
+                             ('population-graph', 'relayoutData', relayout_data),
+                             ('warmup-interval', 'disabled', True)],
+                            changed=[changed])
+
+    return 'display_population_graph', body
+
+
+def search_request(search_value, name):
+    """
+    Get the request of the callback searching lifters.
+
+    :param str search_value: text written by the user.
+    :param str name: name of the selected lifter.
+    :return: tuple, name of the callback and body of the request.
+    """
+    body = get_request_body(['lifterstats-dropdown-name.options'],
+                            [('lifterstats-dropdown-name', 'search_value', search_value)],
+                            [('lifterstats-dropdown-name', 'value', name)],
+                            changed=['lifterstats-dropdown-name.search_value'])
+
+    return 'search_lifterstats_dropdown_name', body
+
+
+def lifter_requests(name):
+    """
+    Get the requests of the callbacks showing a lifter, sent together when a lifter is selected.
+
+    :param str name: name of the lifter.
+    :return: list, name of each callback and body of its request.
+    """
+    inputs = [('lifterstats-dropdown-name', 'value', name), ('warmup-interval', 'disabled', True)]
+    changed = ['lifterstats-dropdown-name.value']
+
+    return [('display_lifterstats_graph_evolution',
+             get_request_body(['lifterstats-graph-evolution.figure'], inputs, changed=changed)),
+            ('display_lifterstats_table_meets',
+             get_request_body(['lifterstats-datatable-meets.data'], inputs, changed=changed))
+            ]
+
+
+def equipment_scenario(rng, names):
+    """
+    Get the requests of a user toggling equipment and switching weight classes.
+
+    :param random.Random rng: random generator of the user.
+    :param list names: names of lifters to choose from.
+    :return: list, name of each callback and body of its request.
+    """
+    classes = rng.choice(list_classes)
+    equipment = ['Raw']
+    requests = []
+    for _ in range(rng.randint(2, 6)):
+        if rng.random() < 0.2:
+            classes = rng.choice(list_classes)
+            changed = 'globalstats-dropdown-weight_classes.value'
+        else:
+            toggled = rng.choice(list_equipment)
+            if toggled not in equipment:
+                equipment = equipment + [toggled]
+            elif len(equipment) > 1:
+                equipment = [eq for eq in equipment if eq != toggled]
+            changed = 'globalstats-dropdown-equipment.value'
+        requests.append(globalstats_request(classes, equipment, changed))
+
+    return requests
+
+
+def years_scenario(rng, names):
+    """
+    Get the requests of a user moving the start of the range of years, like 'top 10 since 2019'.
+
+    :param random.Random rng: random generator of the user.
+    :param list names: names of lifters to choose from.
+    :return: list, name of each callback and body of its request.
+    """
+    classes = rng.choice(list_classes)
+    equipment = ['Raw']
+    start = rng.randint(first_year, last_year)
+    requests = []
+    for _ in range(rng.randint(2, 6)):
+        start = min(max(start + rng.randint(-5, 5), first_year), last_year)
+        years = (start, last_year)
+        requests.append(globalstats_request(classes, equipment, 'globalstats-slider-years.value', years))
+
+    return requests
+
+
+def search_scenario(rng, names):
+    """
+    Get the requests of a user typing the name of a lifter and selecting it.
+
+    :param random.Random rng: random generator of the user.
+    :param list names: names of lifters to choose from.
+    :return: list, name of each callback and body of its request.
+    """
+    name = rng.choice(names)
+    requests = [search_request(name[:i], None) for i in range(1, min(len(name), 8) + 1)]
+
+    return requests + lifter_requests(name)
+
+
+def population_scenario(rng, names):
+    """
+    Get the requests of a user choosing a population and zooming into it.
+
+    :param random.Random rng: random generator of the user.
+    :param list names: names of lifters to choose from.
+    :return: list, name of each callback and body of its request.
+    """
+    classes = rng.choice(list_classes)
+    sex = rng.choice(['M', 'F'])
+    lift = rng.choice(['Total', 'Wilks'])
+    requests = [population_request(classes, ['Raw'], sex, lift, 'population-dropdown-lift.value')]
+
+    # Zoom into a smaller window each time, around the middle of the weights
+    x_range = [40, 160]
+    y_range = [0, 1000] if lift == 'Total' else [0, 700]
+    for _ in range(rng.randint(1, 4)):
+        x_range = [x_range[0] + rng.uniform(0, 10), x_range[1] - rng.uniform(0, 10)]
+        y_range = [y_range[0] + rng.uniform(0, 50), y_range[1] - rng.uniform(0, 50)]
+        relayout_data = {'xaxis.range[0]': x_range[0], 'xaxis.range[1]': x_range[1],
+                         'yaxis.range[0]': y_range[0], 'yaxis.range[1]': y_range[1]}
+        requests.append(population_request(classes, ['Raw'], sex, lift, 'population-graph.relayoutData',
+                                           relayout_data))
+
+    return requests
+
+
+scenarios = {'equipment': equipment_scenario, 'years': years_scenario, 'search': search_scenario,
+             'population': population_scenario}
+
+
+def get_sender(url=None):
+    """
+    Get the function sending requests to the app, through a local server or the test client of the app.
+
+    :param str url: url of the app, None to use the test client of the app imported in this process.
+    :return: callable, function sending a request to a path, a GET one if there is no body, and returning its status
+        code and its content.
+    """
+    local = threading.local()
+
+    # Send through the server, with a session for each thread
+    if url is not None:
+        import requests
+
+        def send(path, body=None):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+            if body is None:
+                r = local.session.get(url.rstrip('/') + path)
+            else:
+                r = local.session.post(url.rstrip('/') + path, json=body)
+            return r.status_code, r.content
+
+        return send
+
+    # Send through the test client otherwise, with a client for each thread
+    import app
+
+    def send(path, body=None):
+        if not hasattr(local, 'client'):
+            local.client = app.app.server.test_client()
+        r = local.client.get(path) if body is None else local.client.post(path, json=body)
+        return r.status_code, r.data
+
+    return send
+
+
+def wait_until_ready(send, timeout=600):
+    """
+    Wait until the app has loaded the data.
+
+    :param callable send: function sending requests, from get_sender.
+    :param float timeout: maximum seconds to wait.
+    """
+    deadline = time.perf_counter() + timeout
+    while send('/ready')[0] != 200:
+        if time.perf_counter() > deadline:
+            raise TimeoutError('The app did not load the data in {} seconds'.format(timeout))
+        time.sleep(0.5)
+
+
+def get_names(send, rng, k=200):
+    """
+    Get names of lifters to search, asking the app for the lifters matching each letter like a user would.
+
+    :param callable send: function sending requests, from get_sender.
+    :param random.Random rng: random generator.
+    :param int k: maximum number of names.
+    :return: list, names of lifters.
+    """
+    names = set()
+    for letter in string.ascii_lowercase:
+        _, body = search_request(letter, None)
+        status, content = send('/_dash-update-component', body)
+        if status == 200:
+            response = json.loads(content)['response']
+            names.update(option['value'] for option in response['lifterstats-dropdown-name']['options'])
+
+    return rng.sample(sorted(names), min(k, len(names)))
+
+
+def run_user(send, rng, names, mix, deadline, think, records):
+    """
+    Simulate a user doing scenarios until a deadline, recording every request.
+
+    :param callable send: function sending requests, from get_sender.
+    :param random.Random rng: random generator of the user.
+    :param list names: names of lifters to search.
+    :param dict mix: share of each scenario, with its name as key.
+    :param float deadline: perf_counter value at which the user stops.
+    :param float think: mean seconds the user waits between requests.
+    :param list records: list to append the (callback, seconds, status code, bytes) of each request.
+    """
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(list(mix), weights=list(mix.values()))[0]
+        for callback, body in scenarios[scenario](rng, names):
+            if time.perf_counter() >= deadline:
+                return
+            start = time.perf_counter()
+            try:
+                status, content = send('/_dash-update-component', body)
+                size = len(content)
+            except Exception:
+                status, size = None, 0
+            records.append((callback, time.perf_counter() - start, status, size))
+            if think > 0:
+                time.sleep(rng.expovariate(1 / think))
+
+
+def summarize(records, duration):
+    """
+    Summarize the latencies and the throughput of each callback.
+
+    :param list records: (callback, seconds, status code, bytes) of each request.
+    :param float duration: seconds the load test lasted.
+    :return: dict, with the name of each callback (and 'all') as key and its summary as value.
+    """
+    summary = {}
+    for callback in sorted({record[0] for record in records}) + ['all']:
+        selected = [record for record in records if callback in ('all', record[0])]
+        latencies = np.array([record[1] for record in selected]) * 1000
+        counts = np.histogram(latencies, bins=[0] + buckets)[0]
+        summary[callback] = {'requests': len(selected),
+                             'errors': sum(record[2] != 200 for record in selected),
+                             'throughput': len(selected) / duration,
+                             'p50_ms': float(np.percentile(latencies, 50)),
+                             'p95_ms': float(np.percentile(latencies, 95)),
+                             'p99_ms': float(np.percentile(latencies, 99)),
+                             'mean_ms': float(latencies.mean()),
+                             'max_ms': float(latencies.max()),
+                             'mean_bytes': float(np.mean([record[3] for record in selected])),
+                             'histogram_ms': {'<=' + str(bucket): int(count) for bucket, count in zip(buckets, counts)}
+                             }
+
+    return summary
+
+
+def run_load_test(send, users=10, duration=30, mix=None, think=0.5, seed=0):
+    """
+    Run concurrent users against the app.
+
+    :param callable send: function sending requests, from get_sender.
+    :param int users: number of concurrent users.
+    :param float duration: seconds the load test lasts.
+    :param dict mix: share of users doing each scenario, with its name as key.
+    :param float think: mean seconds each user waits between requests.
+    :param int seed: seed of the random generators.
+    :return: dict, with the settings and the summary of each callback.
+    """
+    mix = mix or default_mix
+    wait_until_ready(send)
+    names = get_names(send, random.Random(seed))
+
+    # Run the users
+    records = []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=run_user,
+                                args=(send, random.Random(seed + i + 1), names, mix, deadline, think, records))
+               for i in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    return {'users': users,
+            'duration': duration,
+            'mix': mix,
+            'think': think,
+            'seed': seed,
+            'callbacks': summarize(records, duration)
+            }
+
+
+def parse_mix(text):
+    """
+    Parse the share of each scenario, written like 'equipment=0.3,years=0.25,search=0.3,population=0.15'.
+
+    :param str text: share of each scenario.
+    :return: dict, with the name of each scenario as key and its share as value.
+    """
+    mix = {}
+    for item in text.split(','):
+        scenario, share = item.split('=')
+        if scenario not in scenarios:
+            raise argparse.ArgumentTypeError('Unknown scenario {}, use {}'.format(scenario, ', '.join(scenarios)))
+        mix[scenario] = float(share)
+
+    return mix
+
+
+def main(argv=None):
+    """
+    Run the load test from the command line.
+
+    :param list argv: arguments, sys.argv if None.
+    """
+    # Parse arguments
+    parser = argparse.ArgumentParser(description='Load test the callbacks of the app with concurrent users.')
+    parser.add_argument('--url', help='url of a running app, the app is run in this process if not given')
+    parser.add_argument('--rows', type=int, default=100000,
+                        help='number of entries of the synthetic csv loaded when the app runs in this process')
+    parser.add_argument('--cache-size', type=int, default=settings.CACHE_SIZE,
+                        help='size of the cache of the callbacks when the app runs in this process')
+    parser.add_argument('--users', type=int, default=10, help='number of concurrent users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds the load test lasts')
+    parser.add_argument('--mix', type=parse_mix, default=default_mix,
+                        help='share of users doing each scenario, like '
+                             'equipment=0.3,years=0.25,search=0.3,population=0.15')
+    parser.add_argument('--think', type=float, default=0.5, help='mean seconds each user waits between requests')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random generators')
+    parser.add_argument('--data-dir', default=default_data_dir, help='folder to keep the generated csvs')
+    parser.add_argument('--output', help='json to save the results to')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        # Run the app in this process on synthetic data
+        if args.url is None:
+            make_store(get_csv(args.rows, args.seed, args.data_dir), store_dir)
+            settings.CACHE_SIZE = args.cache_size
+            settings.REFRESH_INTERVAL = 0
+
+        # Run the load test
+        results = run_load_test(get_sender(args.url), args.users, args.duration, args.mix, args.think, args.seed)
+
+    # Report the results
+    print('{:<36} {:>8} {:>6} {:>8} {:>9} {:>9} {:>9}'.format('callback', 'requests', 'errors', 'req/s',
+                                                             'p50 ms', 'p95 ms', 'p99 ms'))
+    for callback, summary in results['callbacks'].items():
+        print('{:<36} {:>8} {:>6} {:>8.1f} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            callback, summary['requests'], summary['errors'], summary['throughput'],
+            summary['p50_ms'], summary['p95_ms'], summary['p99_ms']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+# Imports
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import settings
+from app_utils import LIFTS, read_data, read_chunks, load_data, clean_data, get_best_lifts_per_weightclass, \
+    get_best_lifts, plot_best_lifts_per_weightclass, plot_best_lifts, plot_lift_evolution_per_lifter, \
+    plot_lift_evolution, table_meets_per_lifter, table_meets, get_population, bin_population, plot_population, \
+    open_backend, Dataset
+from data_store import save_chunks_to_store
+from generate_data import generate_data, version
+
+# Define some global variables
+default_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+classes = 'IPF'
+equipment = ['Raw', 'Wraps']
+n = 10
+
+# Smallest increase over the baseline considered a regression, to ignore the noise of the fastest stages
+min_increase = {'seconds': 0.005, 'peak_mb': 1.0}
+
+
+# Functions
+def get_csv(rows, seed, data_dir=default_data_dir):
+    """
+    Get the synthetic csv with a number of entries, generating it the first time.
+
+    :param int rows: number of entries.
+    :param int seed: seed of the random generator.
+    :param str data_dir: folder to keep the generated csvs.
+    :return: str, path to the csv.
+    """
+    path = os.path.join(data_dir, 'opl_{}_{}_v{}.csv'.format(rows, seed, version))
+    if not os.path.exists(path):
+        print('Generating {} rows in {}...'.format(rows, path))
+        generate_data(path + '.tmp', rows, seed)
+        os.replace(path + '.tmp', path)
+
+    return path
+
+
+def make_store(path, store_dir):
+    """
+    Keep the data of a csv in a store pinned to it, like store_data does after downloading it, so the app loads it
+    without downloading anything.
+
+    :param str path: path to the csv.
+    :param str store_dir: empty folder to use as store of the data.
+    """
+    settings.STORE_DIR = store_dir
+    settings.PINNED_VERSION = 'benchmark'
+    save_chunks_to_store(read_chunks(path), 'benchmark')
+
+
+def get_stages(path, store_dir, backend='pandas'):
+    """
+    Get the stages to benchmark, each one a function without arguments. The inputs of each stage are prepared
+    beforehand, so only the stage itself is measured.
+
+    :param str path: path to the csv.
+    :param str store_dir: empty folder to use as store of the data.
+    :param str backend: backend of the stages querying the data without precomputed structures.
+    :return: dict, with the name of each stage as key and the function as value.
+    """
+    # Prepare the inputs of the stages
+    make_store(path, store_dir)
+    data = load_data()
+    dataset = Dataset(data)
+    queried = data if backend == 'pandas' else open_backend(backend)
+    df = clean_data(queried, classes, equipment)
+    name = data['Name'].value_counts().index[0]
+    population = get_population(data, equipment, 'M', 'Total')
+
+    return {'read_data': lambda: read_data(path),
+            'load_data': lambda: load_data(),
+            'Dataset': lambda: Dataset(data),
+            'clean_data': lambda: clean_data(queried, classes, equipment),
+            'get_best_lifts_per_weightclass': lambda: [get_best_lifts_per_weightclass(df, lift, sex, n)
+                                                       for sex in ['M', 'F'] for lift in LIFTS],
+            'get_best_lifts': lambda: [get_best_lifts(data, dataset.personal_bests, classes, equipment, lift, sex, n)
+                                       for sex in ['M', 'F'] for lift in LIFTS],
+            'plot_best_lifts_per_weightclass': lambda: plot_best_lifts_per_weightclass(df, 'M', classes, n),
+            'plot_best_lifts': lambda: plot_best_lifts(dataset, 'M', classes, equipment, n),
+            'plot_lift_evolution_per_lifter': lambda: plot_lift_evolution_per_lifter(queried, name),
+            'plot_lift_evolution': lambda: plot_lift_evolution(dataset.get_lifter_meets(name)),
+            'table_meets_per_lifter': lambda: table_meets_per_lifter(queried, name),
+            'table_meets': lambda: table_meets(dataset.get_lifter_meets(name)),
+            'get_population': lambda: get_population(data, equipment, 'M', 'Total'),
+            'bin_population': lambda: bin_population(*population),
+            'plot_population': lambda: plot_population(dataset, population, 'M', classes, equipment, 'Total', n)
+            }
+
+
+def measure(func, repeat):
+    """
+    Measure the seconds and the peak memory taken by a function.
+
+    The seconds are the median of several runs, and the peak memory is measured in a separate run, since tracing the
+    allocations slows the function down.
+
+    :param callable func: function without arguments.
+    :param int repeat: number of timed runs.
+    :return: dict, with the seconds and the peak memory in MB.
+    """
+    # Time the function
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    # Trace the allocations of the function
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': statistics.median(seconds), 'peak_mb': peak / 2 ** 20}
+
+
+def run_benchmarks(sizes, seed=0, repeat=3, data_dir=default_data_dir, backend='pandas'):
+    """
+    Run every stage on synthetic csvs of several sizes.
+
+    :param list sizes: number of entries of each csv.
+    :param int seed: seed of the random generator.
+    :param int repeat: number of timed runs of each stage.
+    :param str data_dir: folder to keep the generated csvs.
+    :param str backend: backend of the stages querying the data without precomputed structures.
+    :return: dict, with the environment and the measures of each size and stage.
+    """
+    results = {'environment': {'python': platform.python_version(),
+                               'pandas': pd.__version__,
+                               'numpy': np.__version__,
+                               'machine': platform.machine()
+                               },
+               'seed': seed,
+               'backend': backend,
+               'sizes': {}
+               }
+    for rows in sizes:
+        path = get_csv(rows, seed, data_dir)
+        with tempfile.TemporaryDirectory() as store_dir:
+            for stage, func in get_stages(path, store_dir, backend).items():
+                result = measure(func, repeat)
+                results['sizes'].setdefault(str(rows), {})[stage] = result
+                print('{:>10} {:<32} {:>9.3f} s {:>9.1f} MB'.format(rows, stage, result['seconds'], result['peak_mb']))
+
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """
+    Compare the measures with a baseline, finding the stages that got slower or use more memory.
+
+    :param dict results: measures, from run_benchmarks.
+    :param dict baseline: measures of the baseline, from run_benchmarks.
+    :param float threshold: relative increase over the baseline considered a regression.
+    :return: list, messages describing the regressions.
+    """
+    regressions = []
+    for rows, stages in results['sizes'].items():
+        for stage, result in stages.items():
+            base = baseline['sizes'].get(rows, {}).get(stage)
+            if base is None:
+                continue
+            for measure_name, unit in [('seconds', 's'), ('peak_mb', 'MB')]:
+                increase = result[measure_name] - base[measure_name]
+                if increase > base[measure_name] * threshold and increase > min_increase[measure_name]:
+                    regressions.append('{} rows, {}: {:.3f} {} -> {:.3f} {} ({:+.0%})'.format(
+                        rows, stage, base[measure_name], unit, result[measure_name], unit,
+                        result[measure_name] / base[measure_name] - 1))
+
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run the benchmarks from the command line.
+
+    :param list argv: arguments, sys.argv if None.
+    :return: int, exit code, 1 if there are regressions.
+    """
+    # Parse arguments
+    parser = argparse.ArgumentParser(description='Benchmark the stages of the app on synthetic data.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000], help='number of entries of each csv')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random generator')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs of each stage')
+    parser.add_argument('--data-dir', default=default_data_dir, help='folder to keep the generated csvs')
+    parser.add_argument('--backend', default=settings.BACKEND, choices=['pandas', 'duckdb'],
+                        help='backend of the stages querying the data without precomputed structures')
+    parser.add_argument('--baseline', help='json with the measures to compare with')
+    parser.add_argument('--save-baseline', help='json to save the measures to')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative increase considered a regression')
+    args = parser.parse_args(argv)
+
+    # Run the benchmarks
+    results = run_benchmarks(args.rows, args.seed, args.repeat, args.data_dir, args.backend)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    # Compare with the baseline
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print('Regression: ' + regression)
+        if regressions:
+            return 1
+        print('No regressions over {:.0%}'.format(args.threshold))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
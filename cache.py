@@ -0,0 +1,113 @@
+# Imports
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# Classes
+class LRUCache:
+    """
+    Cache with a maximum number of entries that evicts the least recently used one and forgets every entry when a new
+    version of the data is used. The values of the previous versions, asked for by the requests that were already in
+    progress, are computed but not stored. A key asked for while it is being computed waits for that computation instead
+    of starting another one.
+    """
+
+    def __init__(self, maxsize):
+        """
+        Initialize an empty cache.
+
+        :param int maxsize: maximum number of entries, 0 to disable the cache.
+        """
+        self.maxsize = maxsize
+        self.version = None
+        self.versions = set()
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, version, key, func):
+        """
+        Get the value of a key, computing and storing it if it is not in the cache.
+
+        :param version: version of the data the value is computed from.
+        :param key: hashable key identifying the value for a version of the data.
+        :param callable func: function without arguments that computes the value.
+        :return: value of the key.
+        """
+        with self.lock:
+            # Forget the entries of the previous version when a new one is used
+            if version not in self.versions:
+                self.versions.add(version)
+                self.entries.clear()
+                self.version = version
+
+            # Look for the key, only the current version is stored
+            if version == self.version and key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+            # Wait for the value if it is being computed, compute it otherwise
+            future = self.pending.get((version, key))
+            if future is None:
+                self.misses += 1
+                future = self.pending[(version, key)] = Future()
+                computing = True
+            else:
+                self.coalesced += 1
+                computing = False
+
+        if not computing:
+            return future.result()
+
+        # Compute the value outside the lock, so other keys are not blocked
+        try:
+            value = func()
+        except BaseException as e:
+            with self.lock:
+                del self.pending[(version, key)]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            # Store the value if its version is still the current one
+            del self.pending[(version, key)]
+            if version == self.version and self.maxsize > 0:
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        future.set_result(value)
+
+        return value
+
+    def clear(self):
+        """
+        Forget every entry.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Get the counters of the cache.
+
+        :return: dict, with the number of hits, misses, lookups that waited for a computation in progress and entries.
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced, 'entries': len(self.entries)}
+
+
+# Functions
+def normalize_equipment(equipment):
+    """
+    Normalize a selection of equipment, so the same selection in any order gives the same key.
+
+    :param list equipment: allowed equipment for the meets.
+    :return: tuple, sorted equipment without duplicates.
+    """
+    return tuple(sorted(set(equipment or [])))
@@ -0,0 +1,527 @@
+# Imports
+import argparse
+import contextlib
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pickle
+import shutil
+import zipfile
+import requests
+import numpy as np
+import pandas as pd
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Functions
+def download_data():
+    """
+    Download the last version of the data and move it to the data folder once it is complete and verified, so the
+    previous versions stay usable if the download fails. An interrupted download is resumed the next time.
+
+    :return: str, version of the data, which is the name of the folder inside the zip.
+    :return: str, ETag (or Last-Modified) of the downloaded file, None if the server sends neither.
+    """
+    # Download zip from url
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    path = os.path.join(settings.DATA_DIR, '.download.zip')
+    etag = fetch_file(settings.DATA_URL, path, sha256=settings.DATA_SHA256)
+
+    # Obtain the version from the folder inside the zip
+    try:
+        with zipfile.ZipFile(path, "r") as zip_ref:
+            version = zip_ref.namelist()[0].split('/')[0]
+    except zipfile.BadZipFile:
+        os.remove(path)
+        raise
+
+    # Move the version to the data folder
+    os.replace(path, get_downloaded_path(version))
+
+    return version, etag
+
+
+def fetch_file(url, path, sha256=None, chunk_size=settings.DOWNLOAD_CHUNK, timeout=settings.DOWNLOAD_TIMEOUT):
+    """
+    Download a file, resuming the partial download left by a previous call if the file has not changed since.
+
+    :param str url: url of the file.
+    :param str path: path to save the file.
+    :param str sha256: expected checksum of the file, None to skip the check.
+    :param int chunk_size: bytes written at once.
+    :param float timeout: seconds to wait for the server to connect or send data.
+    :return: str, ETag (or Last-Modified) of the file, None if the server sends neither.
+    """
+    part = path + '.part'
+
+    # Find the partial download and the version of the file it belongs to
+    try:
+        with open(part + '.json') as f:
+            validator = json.load(f)['validator']
+        offset = os.path.getsize(part)
+    except (FileNotFoundError, KeyError, ValueError):
+        validator = None
+        offset = 0
+
+    # Ask for the rest of the file, the server sends the whole file if it has changed
+    headers = {'Range': 'bytes={}-'.format(offset), 'If-Range': validator} if offset and validator else {}
+    with requests.get(url, stream=True, headers=headers, timeout=timeout) as r:
+        if r.status_code == 416:
+            # The partial download is already complete or invalid, start again
+            for file in [part, part + '.json']:
+                os.remove(file)
+            return fetch_file(url, path, sha256, chunk_size, timeout)
+        r.raise_for_status()
+
+        # Remember the version of the file, to resume the download if it is interrupted
+        validator = r.headers.get('ETag') or r.headers.get('Last-Modified')
+        with open(part + '.json', 'w') as f:
+            json.dump({'validator': validator}, f)
+
+        # Obtain the expected size
+        if r.status_code == 206:
+            size = int(r.headers['Content-Range'].split('/')[-1])
+        else:
+            offset = 0
+            size = int(r.headers['Content-Length']) if 'Content-Length' in r.headers else None
+
+        # Write the file
+        logger.info('Downloading %s from byte %d', url, offset)
+        with open(part, 'ab' if offset else 'wb') as fd:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                fd.write(chunk)
+
+    # Check the size, an incomplete file is kept to resume the download
+    if size is not None and os.path.getsize(part) != size:
+        raise IOError('Incomplete download of {}: {} of {} bytes'.format(url, os.path.getsize(part), size))
+
+    # Check the checksum, a corrupted file is removed
+    if sha256 is not None and get_sha256(part) != sha256.lower():
+        for file in [part, part + '.json']:
+            os.remove(file)
+        raise IOError('Wrong checksum for {}'.format(url))
+
+    # Make the file available
+    os.replace(part, path)
+    os.remove(part + '.json')
+
+    return validator
+
+
+def get_sha256(path, chunk_size=settings.DOWNLOAD_CHUNK):
+    """
+    Compute the SHA-256 checksum of a file.
+
+    :param str path: path to the file.
+    :param int chunk_size: bytes read at once.
+    :return: str, hexadecimal checksum.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def get_remote_version(timeout=10):
+    """
+    Ask the server for the version of the data without downloading it.
+
+    :param float timeout: seconds to wait for the server.
+    :return: str, ETag (or Last-Modified) of the remote file, None if it can not be obtained.
+    """
+    try:
+        r = requests.head(settings.DATA_URL, allow_redirects=True, timeout=timeout)
+        r.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning('Could not check the remote version of the data: %s', e)
+        return None
+
+    return r.headers.get('ETag') or r.headers.get('Last-Modified')
+
+
+def get_downloaded_path(version):
+    """
+    Get the path to the zip of a downloaded version.
+
+    :param str version: name of the folder inside the zip.
+    :return: str, path to the zip.
+    """
+    return os.path.join(settings.DATA_DIR, version + '.zip')
+
+
+@contextlib.contextmanager
+def open_downloaded_csv(version):
+    """
+    Open the csv of a downloaded version, which is read straight from the zip without extracting it. The checksum of
+    the csv inside the zip is checked once it is read to the end.
+
+    :param str version: name of the folder inside the zip.
+    :return: file object with the csv.
+    """
+    with zipfile.ZipFile(get_downloaded_path(version), "r") as zip_ref:
+        with zip_ref.open(version + '/' + version + '.csv') as f:
+            yield f
+
+
+def read_manifest():
+    """
+    Read the manifest of the store.
+
+    :return: dict, with keys 'current', 'etag', 'pinned' and 'versions'.
+    """
+    try:
+        with open(os.path.join(settings.STORE_DIR, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    manifest.setdefault('current', None)
+    manifest.setdefault('etag', None)
+    manifest.setdefault('pinned', None)
+    manifest.setdefault('versions', [])
+
+    return manifest
+
+
+def write_manifest(manifest):
+    """
+    Write the manifest of the store atomically.
+
+    :param dict manifest: manifest of the store.
+    """
+    os.makedirs(settings.STORE_DIR, exist_ok=True)
+    path = os.path.join(settings.STORE_DIR, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def get_store_path(version):
+    """
+    Get the path of a version in the store.
+
+    :param str version: version of the data.
+    :return: str, path to the parquet file.
+    """
+    return os.path.join(settings.STORE_DIR, version, 'data.parquet')
+
+
+def is_stored(version):
+    """
+    Check if a version is available in the store.
+
+    :param str version: version of the data.
+    :return: bool, True if the version can be loaded from the store.
+    """
+    return version is not None and os.path.exists(get_store_path(version))
+
+
+def save_chunks_to_store(chunks, version, etag=None):
+    """
+    Save clean data arriving in chunks in the store and make it the current version, writing each chunk as it arrives
+    so the whole data is never in memory.
+
+    :param iterable chunks: dataframes with clean data from some meets, all with the same columns.
+    :param str version: version of the data.
+    :param str etag: ETag (or Last-Modified) of the downloaded file.
+    :return: bool, True if the data was saved, False if parquet files can not be written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        logger.warning('Could not save the data in the store: %s', e)
+        return False
+
+    # Write the chunks, with the types of the first one so a chunk with an empty column does not change them
+    path = get_store_path(version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = pa.schema([(col, pa.from_numpy_dtype(dtype) if pd.api.types.is_datetime64_any_dtype(dtype)
+                                     else pa.float64() if pd.api.types.is_float_dtype(dtype) else pa.string())
+                                    for col, dtype in chunk.dtypes.items()])
+                writer = pq.ParquetWriter(path + '.tmp', schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError('Version {} of the data has no valid meets'.format(version))
+    os.replace(path + '.tmp', path)
+    set_current_version(version, etag)
+
+    return True
+
+
+def set_current_version(version, etag=None):
+    """
+    Make a stored version the current one in the manifest.
+
+    :param str version: version of the data.
+    :param str etag: ETag (or Last-Modified) of the downloaded file.
+    """
+    manifest = read_manifest()
+    manifest['current'] = version
+    manifest['etag'] = etag
+    if version not in manifest['versions']:
+        manifest['versions'].append(version)
+    write_manifest(manifest)
+
+
+def load_from_store(version, filters=None, categories=None):
+    """
+    Load a version of clean data from the store, reading only the meets matching some filters.
+
+    :param str version: version of the data.
+    :param list filters: conditions of the meets to read, like [('Wilks', '>=', 400)], evaluated by the parquet reader
+        so the other meets are skipped without loading them. None to read all of them.
+    :param list categories: text columns to read as categories, if stored as plain text.
+    :return: pd.DataFrame, clean data from the meets.
+    """
+    if filters is None and categories is None:
+        return pd.read_parquet(get_store_path(version))
+
+    return pd.read_parquet(get_store_path(version), filters=filters, read_dictionary=categories)
+
+
+def get_pinned_version():
+    """
+    Get the pinned version of the data, if any. The environment variable takes precedence over the manifest.
+
+    :return: str, pinned version, None if the latest version has to be used.
+    """
+    return settings.PINNED_VERSION or read_manifest()['pinned']
+
+
+def pin_version(version):
+    """
+    Pin a version of the data, so it is used instead of the latest one.
+
+    :param str version: version of the data, None to unpin.
+    """
+    if version is not None and not is_stored(version):
+        raise ValueError('Version {} is not in the store'.format(version))
+
+    manifest = read_manifest()
+    manifest['pinned'] = version
+    write_manifest(manifest)
+
+
+def remove_old_versions(keep=settings.KEEP_VERSIONS):
+    """
+    Remove the versions of the data that are not among the last ones stored, except the pinned one.
+
+    :param int keep: number of versions to keep.
+    """
+    # Find the versions to keep
+    manifest = read_manifest()
+    kept = manifest['versions'][-keep:] if keep > 0 else []
+    if manifest['current'] is not None and manifest['current'] not in kept:
+        kept.append(manifest['current'])
+    pinned = get_pinned_version()
+    if pinned is not None and pinned not in kept:
+        kept.append(pinned)
+
+    # Update the manifest before removing the files, so a removed version is never listed
+    removed = [version for version in manifest['versions'] if version not in kept]
+    manifest['versions'] = [version for version in manifest['versions'] if version in kept]
+    write_manifest(manifest)
+
+    # Remove the files
+    for version in removed:
+        logger.info('Removing version %s', version)
+        shutil.rmtree(os.path.join(settings.STORE_DIR, version), ignore_errors=True)
+        if os.path.exists(get_downloaded_path(version)):
+            os.remove(get_downloaded_path(version))
+
+
+def save_columns(data, path):
+    """
+    Save a dataframe as one NumPy file per column, which can be memory mapped. Text columns are saved as categories.
+
+    :param pd.DataFrame data: dataframe with numeric, datetime, categorical or text columns.
+    :param str path: folder to save the files.
+    """
+    os.makedirs(path, exist_ok=True)
+    columns = []
+    for i, col in enumerate(data):
+        s = data[col]
+        if s.dtype.kind in 'biuf':
+            columns.append({'name': col, 'kind': 'numeric'})
+            values = s.to_numpy()
+        elif s.dtype.kind == 'M':
+            columns.append({'name': col, 'kind': 'datetime', 'dtype': str(s.dtype)})
+            values = s.to_numpy().view('int64')
+        else:
+            s = s.astype('category')
+            columns.append({'name': col, 'kind': 'category', 'categories': s.cat.categories.tolist()})
+            values = s.cat.codes.to_numpy()
+        np.save(os.path.join(path, '{}.npy'.format(i)), values)
+
+    with open(os.path.join(path, 'columns.json'), 'w') as f:
+        json.dump(columns, f)
+
+
+def load_columns(path):
+    """
+    Load a dataframe saved with save_columns, memory mapping the files read-only, so every process loading the same
+    files shares their memory.
+
+    :param str path: folder with the files.
+    :return: pd.DataFrame, read-only dataframe.
+    """
+    with open(os.path.join(path, 'columns.json')) as f:
+        columns = json.load(f)
+
+    data = {}
+    for i, col in enumerate(columns):
+        values = np.load(os.path.join(path, '{}.npy'.format(i)), mmap_mode='r')
+        if col['kind'] == 'datetime':
+            values = values.view(col['dtype'])
+        elif col['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(col['categories']), validate=False)
+        data[col['name']] = values
+
+    return pd.DataFrame(data, copy=False)
+
+
+def save_structures(structures, path):
+    """
+    Save structures made of containers and objects holding NumPy arrays, pickling them with each numeric array saved
+    apart in a NumPy file, so the arrays can be memory mapped and only the containers are unpickled.
+
+    :param structures: object to save.
+    :param str path: folder to save the files.
+    """
+    os.makedirs(os.path.join(path, 'arrays'), exist_ok=True)
+    ids = itertools.count()
+
+    def persistent_id(obj):
+        # Arrays of objects can not be memory mapped, they are pickled like the containers
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject:
+            return None
+        i = next(ids)
+        np.save(os.path.join(path, 'arrays', '{}.npy'.format(i)), obj)
+        return i
+
+    with open(os.path.join(path, 'structures.pkl'), 'wb') as f:
+        pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = persistent_id
+        pickler.dump(structures)
+
+
+def load_structures(path):
+    """
+    Load structures saved with save_structures, memory mapping their arrays read-only, so every process loading the
+    same files shares their memory.
+
+    :param str path: folder with the files.
+    :return: loaded structures.
+    """
+    with open(os.path.join(path, 'structures.pkl'), 'rb') as f:
+        unpickler = pickle.Unpickler(f)
+        unpickler.persistent_load = lambda i: np.load(os.path.join(path, 'arrays', '{}.npy'.format(i)), mmap_mode='r')
+        return unpickler.load()
+
+
+def get_shared_version():
+    """
+    Get the version of the dataset published in the shared folder.
+
+    :return: str, version of the data.
+    """
+    try:
+        with open(os.path.join(settings.SHARED_DIR, 'current')) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise FileNotFoundError('No dataset in {}, run "python data_store.py share" first'.format(settings.SHARED_DIR))
+
+
+def get_shared_path(version):
+    """
+    Get the folder of a version of the dataset in the shared folder.
+
+    :param str version: version of the data.
+    :return: str, path to the folder.
+    """
+    return os.path.join(settings.SHARED_DIR, version)
+
+
+def publish_shared(dataset, keep=settings.KEEP_VERSIONS):
+    """
+    Save a dataset in the shared folder and make it the current version, removing the old versions. The processes
+    using a removed version keep their memory maps until they load the new one.
+
+    :param Dataset dataset: data with its precomputed structures.
+    :param int keep: number of versions to keep.
+    """
+    # Save the dataset in a staging folder and move it once it is complete
+    path = get_shared_path(dataset.version)
+    shutil.rmtree(path + '.tmp', ignore_errors=True)
+    dataset.save(path + '.tmp')
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(path + '.tmp', path)
+
+    # Make it the current version
+    with open(os.path.join(settings.SHARED_DIR, 'current.tmp'), 'w') as f:
+        f.write(dataset.version)
+    os.replace(os.path.join(settings.SHARED_DIR, 'current.tmp'), os.path.join(settings.SHARED_DIR, 'current'))
+
+    # Remove the old versions
+    versions = sorted(entry.name for entry in os.scandir(settings.SHARED_DIR)
+                      if entry.is_dir() and not entry.name.endswith('.tmp'))
+    for version in versions[:-keep]:
+        if version != dataset.version:
+            shutil.rmtree(get_shared_path(version), ignore_errors=True)
+
+
+def main(argv=None):
+    """
+    Command line interface to manage the store.
+
+    :param list argv: command line arguments.
+    """
+    # Lazy import, app_utils depends on this module
+    from app_utils import store_data, load_data, Dataset
+
+    # Parse arguments
+    parser = argparse.ArgumentParser(description='Manage the local store of openpowerlifting.org data.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help='show the current, pinned and stored versions')
+    subparsers.add_parser('refresh', help='download and store the latest version')
+    parser_pin = subparsers.add_parser('pin', help='pin a stored version')
+    parser_pin.add_argument('version')
+    subparsers.add_parser('unpin', help='use the latest version again')
+    subparsers.add_parser('share', help='publish the data and its indexes in the shared folder for the workers')
+    args = parser.parse_args(argv)
+
+    # Run command
+    if args.command == 'refresh':
+        store_data(refresh=True)
+    elif args.command == 'pin':
+        pin_version(args.version)
+    elif args.command == 'unpin':
+        pin_version(None)
+    elif args.command == 'share':
+        if not settings.SHARED_DIR:
+            parser.error('set OPL_SHARED_DIR to the folder to share the data in')
+        publish_shared(Dataset(load_data()))
+
+    manifest = read_manifest()
+    print('Current: {}'.format(manifest['current']))
+    print('Pinned:  {}'.format(get_pinned_version()))
+    print('Stored:  {}'.format(', '.join(manifest['versions'])))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
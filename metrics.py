@@ -0,0 +1,246 @@
+# Imports
+import collections
+import contextlib
+import functools
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the buckets of the histograms of wall time
+BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf')]
+
+
+# Classes
+class Metrics:
+    """
+    Counters of the wall time, CPU time, allocated memory, errors and output bytes of named blocks of code, like the
+    callbacks or their stages, together with gauges, that are rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        """
+        Initialize the counters empty.
+        """
+        self.series = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, name, wall, cpu, allocated=0, error=False, size=0):
+        """
+        Record a run of a block of code.
+
+        :param str kind: kind of block, like 'callback' or 'stage'.
+        :param str name: name of the block.
+        :param float wall: seconds of wall time.
+        :param float cpu: seconds of CPU time of the thread.
+        :param int allocated: bytes allocated and not freed by the block, 0 if the allocations are not traced.
+        :param bool error: flag indicating if the block raised an exception.
+        :param int size: bytes of the output of the block, like the response to a request, 0 if not measured.
+        """
+        with self.lock:
+            series = self.series.setdefault((kind, name), {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'allocated': 0,
+                                                           'errors': 0, 'bytes': 0, 'buckets': [0] * len(BUCKETS)})
+            series['count'] += 1
+            series['wall'] += wall
+            series['cpu'] += cpu
+            series['allocated'] += allocated
+            series['errors'] += error
+            series['bytes'] += size
+            series['buckets'][next(i for i, bucket in enumerate(BUCKETS) if wall <= bucket)] += 1
+
+    @contextlib.contextmanager
+    def measure(self, kind, name, profile=False):
+        """
+        Measure a block of code, profiling it if it is slow and the profiling is enabled.
+
+        The allocated memory is only measured if tracemalloc is tracing, and it is approximate when several blocks run
+        at the same time, since tracemalloc does not tell the threads apart.
+
+        :param str kind: kind of block, like 'callback' or 'stage'.
+        :param str name: name of the block.
+        :param bool profile: flag indicating if a slow block has to be profiled.
+        """
+        profiler = SamplingProfiler() if profile and settings.PROFILE_SLOW > 0 else contextlib.nullcontext()
+        tracing = tracemalloc.is_tracing()
+        memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+        error = False
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            with profiler:
+                yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            allocated = tracemalloc.get_traced_memory()[0] - memory if tracing else 0
+            self.record(kind, name, wall, cpu, allocated, error)
+            if isinstance(profiler, SamplingProfiler) and wall >= settings.PROFILE_SLOW:
+                path = os.path.join(settings.PROFILE_DIR, '{}-{}.folded'.format(int(time.time() * 1000), name))
+                profiler.dump(path)
+                logger.warning('Slow %s %s took %.2f s, profile saved in %s', kind, name, wall, path)
+
+    def set_gauge(self, name, value, labels=None, description=''):
+        """
+        Set the value of a gauge.
+
+        :param str name: name of the gauge.
+        :param float value: value of the gauge.
+        :param dict labels: labels of the value, if any.
+        :param str description: description of the gauge.
+        """
+        with self.lock:
+            gauge = self.gauges.setdefault(name, {'description': description, 'values': {}})
+            gauge['values'][tuple(sorted((labels or {}).items()))] = value
+
+    def render(self):
+        """
+        Render the counters and the gauges in the Prometheus text format.
+
+        :return: str, text with the metrics.
+        """
+        with self.lock:
+            series = {key: dict(value, buckets=list(value['buckets'])) for key, value in self.series.items()}
+            gauges = {name: dict(gauge, values=dict(gauge['values'])) for name, gauge in self.gauges.items()}
+
+        lines = []
+        for kind in sorted({kind for kind, _ in series}):
+            names = sorted(name for k, name in series if k == kind)
+            prefix = 'opl_' + kind
+
+            # Histogram of the wall time
+            lines += ['# HELP {}_seconds Wall time of each {}.'.format(prefix, kind),
+                      '# TYPE {}_seconds histogram'.format(prefix)]
+            for name in names:
+                s = series[(kind, name)]
+                for bucket, count in zip(BUCKETS, itertools.accumulate(s['buckets'])):
+                    lines.append('{}_seconds_bucket{{name="{}",le="{}"}} {}'.format(
+                        prefix, escape(name), '+Inf' if bucket == float('inf') else bucket, count))
+                lines.append('{}_seconds_sum{{name="{}"}} {}'.format(prefix, escape(name), s['wall']))
+                lines.append('{}_seconds_count{{name="{}"}} {}'.format(prefix, escape(name), s['count']))
+
+            # Counters
+            for key, metric, description in [('cpu', 'cpu_seconds_total', 'CPU time'),
+                                             ('allocated', 'allocated_bytes_total', 'Memory allocated and not freed'),
+                                             ('errors', 'errors_total', 'Exceptions raised')]:
+                lines += ['# HELP {}_{} {} of each {}.'.format(prefix, metric, description, kind),
+                          '# TYPE {}_{} counter'.format(prefix, metric)]
+                lines += ['{}_{}{{name="{}"}} {}'.format(prefix, metric, escape(name), series[(kind, name)][key])
+                          for name in names]
+
+            # Bytes of the outputs, only for the kinds of blocks measuring them
+            if any(series[(kind, name)]['bytes'] for name in names):
+                lines += ['# HELP {}_bytes_total Bytes of the output of each {}.'.format(prefix, kind),
+                          '# TYPE {}_bytes_total counter'.format(prefix)]
+                lines += ['{}_bytes_total{{name="{}"}} {}'.format(prefix, escape(name), series[(kind, name)]['bytes'])
+                          for name in names]
+
+        # Gauges
+        for name, gauge in sorted(gauges.items()):
+            lines += ['# HELP {} {}'.format(name, gauge['description']), '# TYPE {} gauge'.format(name)]
+            for labels, value in gauge['values'].items():
+                text = ','.join('{}="{}"'.format(label, escape(value)) for label, value in labels)
+                lines.append('{}{} {}'.format(name, '{' + text + '}' if text else '', value))
+
+        return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler:
+    """
+    Profiler that samples the stack of a thread at regular intervals from another thread, counting the samples of each
+    stack to make a flame graph.
+    """
+
+    def __init__(self, interval=None):
+        """
+        Initialize the profiler for the current thread.
+
+        :param float interval: seconds between samples, settings.PROFILE_INTERVAL if None.
+        """
+        self.interval = settings.PROFILE_INTERVAL if interval is None else interval
+        self.thread_id = threading.get_ident()
+        self.stacks = collections.Counter()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+
+    def __enter__(self):
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.sampler.join()
+
+    def sample(self):
+        """
+        Sample the stack of the profiled thread until the profiler is stopped.
+        """
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append('{} ({})'.format(frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        """
+        Save the samples in the folded format read by flamegraph.pl, speedscope and similar tools.
+
+        :param str path: path to the file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write('{} {}\n'.format(stack, count))
+
+
+# Functions
+def escape(value):
+    """
+    Escape the value of a label of the Prometheus text format.
+
+    :param value: value of the label.
+    :return: str, escaped value.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def instrument(name=None, kind='stage', profile=False):
+    """
+    Decorate a function to measure each call to it.
+
+    :param str name: name of the block, the name of the function if None.
+    :param str kind: kind of block, like 'callback' or 'stage'.
+    :param bool profile: flag indicating if slow calls have to be profiled.
+    :return: callable, decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.METRICS:
+                return func(*args, **kwargs)
+            with registry.measure(kind, name or func.__name__, profile):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Metrics of the process
+registry = Metrics()
+
+# Trace the allocations if enabled, which slows everything down
+if settings.METRICS and settings.TRACE_ALLOCATIONS and not tracemalloc.is_tracing():
+    tracemalloc.start()
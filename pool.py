@@ -0,0 +1,176 @@
+# Imports
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import settings
+from app_utils import Dataset
+
+logger = logging.getLogger(__name__)
+
+# Dataset of a process of the pool, loaded the first time a task uses its version
+worker_dataset = None
+
+
+# Classes
+class TaskPool:
+    """
+    Bounded pool of processes running CPU heavy functions of the dataset outside the server, so they do not hold its
+    GIL. Each process memory maps the saved dataset read-only, so they all share its memory.
+    """
+
+    def __init__(self, workers, queue_size=settings.POOL_QUEUE, timeout=settings.POOL_TIMEOUT,
+                 folder=settings.POOL_DIR):
+        """
+        Initialize the pool, the processes are started when the first tasks arrive.
+
+        :param int workers: number of processes.
+        :param int queue_size: maximum number of tasks waiting for a process, besides the running ones.
+        :param float timeout: seconds to wait for a task, both to be queued and to finish.
+        :param str folder: folder to save the data for the processes, if it is not in the shared folder, in a subfolder
+            for each app process using the pool.
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.folder = folder
+        self.executor = concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def share(self, dataset):
+        """
+        Save a dataset for the processes, unless it is mapped from the shared folder, removing the other versions. The
+        processes using a removed version keep their memory maps until they load the new one.
+
+        Each app process saves in its own subfolder, named after its process id, since several of them (like the
+        workers of gunicorn) may use the same folder. The subfolders of the app processes that ended are removed.
+
+        :param Dataset dataset: data with its precomputed structures, its path is set to the saved folder.
+        """
+        if dataset.path is not None:
+            return
+        remove_stale_folders(self.folder)
+
+        # Save the dataset in a staging folder and move it once it is complete
+        folder = os.path.join(self.folder, str(os.getpid()))
+        path = os.path.join(folder, dataset.version)
+        if not os.path.exists(path):
+            shutil.rmtree(path + '.tmp', ignore_errors=True)
+            dataset.save(path + '.tmp')
+            os.replace(path + '.tmp', path)
+        dataset.path = path
+
+        # Remove the other versions
+        for entry in os.scandir(folder):
+            if entry.path != path:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def run(self, dataset, func, *args, timeout=None):
+        """
+        Run a function of the dataset in a process of the pool and wait for its result.
+
+        A task that times out while running keeps its process until it finishes, since the processes can not be
+        interrupted, so it still counts towards the bound of the pool.
+
+        :param Dataset dataset: data shared with the processes, see share.
+        :param callable func: function of the module level taking the dataset and the arguments.
+        :param args: arguments of the function, which must be picklable.
+        :param float timeout: seconds to wait for the task, the timeout of the pool if None.
+        :return: result of the function.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        # Wait for room in the queue
+        if not self.slots.acquire(timeout=timeout):
+            with self.lock:
+                self.rejected += 1
+            raise TimeoutError('The pool is full, {} tasks pending'.format(self.pending))
+        with self.lock:
+            self.pending += 1
+        future = self.executor.submit(run_task, dataset.path, func, args)
+        future.add_done_callback(self.release)
+
+        # Wait for the result
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            with self.lock:
+                self.timeouts += 1
+            raise TimeoutError('{} took longer than {:g} s'.format(func.__name__, timeout))
+
+    def release(self, future):
+        """
+        Free the slot of a finished or cancelled task.
+
+        :param concurrent.futures.Future future: future of the task.
+        """
+        with self.lock:
+            self.pending -= 1
+            self.completed += not future.cancelled()
+        self.slots.release()
+
+    def stats(self):
+        """
+        Get the counters of the pool.
+
+        :return: dict, with the number of processes, tasks running or queued, tasks queued, tasks completed, tasks
+            that timed out and tasks rejected because the pool was full.
+        """
+        with self.lock:
+            return {'workers': self.workers,
+                    'pending': self.pending,
+                    'queued': max(0, self.pending - self.workers),
+                    'completed': self.completed,
+                    'timeouts': self.timeouts,
+                    'rejected': self.rejected
+                    }
+
+
+# Functions
+def remove_stale_folders(folder):
+    """
+    Remove the subfolders of the app processes that are not running anymore, named after their process id.
+
+    :param str folder: folder with the subfolders.
+    """
+    # The processes can only be checked without side effects on POSIX
+    if os.name != 'posix' or not os.path.isdir(folder):
+        return
+
+    for entry in os.scandir(folder):
+        if not entry.name.isdigit():
+            continue
+        try:
+            os.kill(int(entry.name), 0)
+        except ProcessLookupError:
+            shutil.rmtree(entry.path, ignore_errors=True)
+        except PermissionError:
+            pass
+
+
+def run_task(path, func, args):
+    """
+    Run a function of the dataset in a process of the pool, mapping the dataset if it is not mapped yet. The data and
+    its structures are mapped read-only, so the processes share them.
+
+    :param str path: folder of the saved dataset.
+    :param callable func: function taking the dataset and the arguments.
+    :param tuple args: arguments of the function.
+    :return: result of the function.
+    """
+    global worker_dataset
+
+    if worker_dataset is None or worker_dataset.path != path:
+        worker_dataset = Dataset.load(path)
+        logger.info('Process %d mapped version %s of the data', os.getpid(), worker_dataset.version)
+
+    return func(worker_dataset, *args)
@@ -0,0 +1,85 @@
+# Imports
+import os
+
+
+# Paths
+DATA_DIR = os.environ.get('OPL_DATA_DIR', 'data')
+STORE_DIR = os.environ.get('OPL_STORE_DIR', 'store')
+
+# Source of the data
+DATA_URL = os.environ.get('OPL_DATA_URL',
+                          'https://github.com/sstangl/openpowerlifting-static/raw/gh-pages/openpowerlifting-latest.zip')
+
+# Version of the dataset to use instead of the latest one, if any
+PINNED_VERSION = os.environ.get('OPL_DATA_VERSION') or None
+
+# Json with weight class schemes added to the default ones, if any
+WEIGHT_CLASSES = os.environ.get('OPL_WEIGHT_CLASSES') or None
+
+# Meets loaded or queried: the ones with at least this Wilks (0 for all of them) of these comma separated events (empty
+# for all of them). The store keeps every meet, so changing them does not need to download the data again
+MIN_WILKS = float(os.environ.get('OPL_MIN_WILKS', '400'))
+EVENTS = [event for event in os.environ.get('OPL_EVENTS', 'SBD').split(',') if event]
+
+# Engine of the queries of the data: 'pandas' loads the meets in memory with the structures of every view, 'duckdb'
+# queries the store without loading it, so every meet (OPL_MIN_WILKS=0) can be used, answering only the global stats
+# and the lifters
+BACKEND = os.environ.get('OPL_BACKEND', 'pandas')
+
+# Approximate memory in MB for each chunk of the csv while reading it, 0 to read it at once
+INGEST_MEMORY = int(os.environ.get('OPL_INGEST_MEMORY', '256'))
+
+# Store the data with categories and single precision to reduce its memory
+COMPACT = os.environ.get('OPL_COMPACT', '1') == '1'
+
+# Draw the scatter plots of the global stats with WebGL, which is faster with many points
+WEBGL = os.environ.get('OPL_WEBGL', '1') == '1'
+
+# Maximum number of figures and tables kept in the cache of the callbacks, 0 to disable it
+CACHE_SIZE = int(os.environ.get('OPL_CACHE_SIZE', '512'))
+
+# Maximum number of rankings kept in the cache of the rankings table, each one taking a few bytes per lifter
+RANKINGS_CACHE_SIZE = int(os.environ.get('OPL_RANKINGS_CACHE_SIZE', '16'))
+
+# Maximum number of populations kept in the cache of the density plot, each one taking 8 bytes per meet
+POPULATION_CACHE_SIZE = int(os.environ.get('OPL_POPULATION_CACHE_SIZE', '4'))
+
+# Number of versions of the data kept in the store
+KEEP_VERSIONS = int(os.environ.get('OPL_KEEP_VERSIONS', '2'))
+
+# Seconds between checks for a new version of the data while the app runs, 0 to never check
+REFRESH_INTERVAL = int(os.environ.get('OPL_REFRESH_INTERVAL', '86400'))
+
+# Expected SHA-256 checksum of the downloaded zip, if known
+DATA_SHA256 = os.environ.get('OPL_DATA_SHA256') or None
+
+# Bytes written at once while downloading the data and seconds to wait for the server
+DOWNLOAD_CHUNK = 2 ** 20
+DOWNLOAD_TIMEOUT = int(os.environ.get('OPL_DOWNLOAD_TIMEOUT', '60'))
+
+# Folder where a loader process publishes the data for the workers to memory map it, None to load it in each process
+SHARED_DIR = os.environ.get('OPL_SHARED_DIR') or None
+
+# Number of processes running the heaviest callbacks, 0 to run them in the thread of the request
+POOL_WORKERS = int(os.environ.get('OPL_POOL_WORKERS', '0'))
+
+# Maximum number of tasks waiting for a process, besides the running ones, and seconds a request waits for its task
+POOL_QUEUE = int(os.environ.get('OPL_POOL_QUEUE', '8'))
+POOL_TIMEOUT = float(os.environ.get('OPL_POOL_TIMEOUT', '30'))
+
+# Folder where the data is saved for the processes to memory map it, if it is not in the shared folder already
+POOL_DIR = os.environ.get('OPL_POOL_DIR', 'pool')
+
+# Seconds a request waits for the data while the app warms up before showing a loading message
+WARMUP_WAIT = float(os.environ.get('OPL_WARMUP_WAIT', '5'))
+
+# Measure the callbacks and their stages, exposed in /metrics
+METRICS = os.environ.get('OPL_METRICS', '1') == '1'
+
+# Trace the memory allocated by the callbacks and their stages, which slows them down
+TRACE_ALLOCATIONS = os.environ.get('OPL_TRACE_ALLOCATIONS', '0') == '1'
+
+# Seconds after which a callback is considered slow and its profile is saved, 0 to never profile
+PROFILE_SLOW = float(os.environ.get('OPL_PROFILE_SLOW', '0'))
+PROFILE_DIR = os.environ.get('OPL_PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL = 0.005
@@ -0,0 +1,90 @@
+# Imports
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+import settings  # noqa: E402
+from generate_data import generate_data  # noqa: E402
+from load_test import get_request_body, globalstats_request, population_request  # noqa: E402
+from run_benchmarks import make_store  # noqa: E402
+
+
+# Fixtures
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    """
+    Run the app on a small synthetic csv, waiting until it has loaded the data.
+
+    :return: FlaskClient, test client of the app.
+    """
+    folder = tmp_path_factory.mktemp('app')
+    generate_data(str(folder / 'opl.csv'), 5000, 0)
+    make_store(str(folder / 'opl.csv'), str(folder / 'store'))
+    settings.REFRESH_INTERVAL = 0
+    import app
+    assert app.dataset_ready.wait(120)
+
+    return app.app.server.test_client()
+
+
+# Functions
+def get_figure(client, request):
+    """
+    Send the request of a callback plotting a figure.
+
+    :param FlaskClient client: test client of the app.
+    :param tuple request: name of the callback and body of its request.
+    :return: dict, figure plotted by the callback.
+    """
+    r = client.post('/_dash-update-component', json=request[1])
+    assert r.status_code == 200
+
+    return json.loads(r.data)['response']['population-graph']['figure']
+
+
+# Tests
+def test_population_graph(client):
+    figure = get_figure(client, population_request('IPF', ['Raw'], 'M', 'Total', 'population-dropdown-lift.value'))
+
+    # The density of the population is plotted with the best lifters of each weight class on top
+    assert figure['data'][0]['type'] == 'heatmap'
+    assert len(figure['data']) > 1
+    assert figure['layout']['xaxis']['range'][0] < 60 < 120 < figure['layout']['xaxis']['range'][1]
+
+
+def test_population_graph_zoom(client):
+    relayout_data = {'xaxis.range[0]': 70, 'xaxis.range[1]': 90, 'yaxis.range[0]': 400, 'yaxis.range[1]': 700}
+    figure = get_figure(client, population_request('IPF', ['Raw'], 'M', 'Total', 'population-graph.relayoutData',
+                                                   relayout_data))
+
+    # Only the window zoomed is binned again
+    assert figure['data'][0]['type'] == 'heatmap'
+    assert figure['layout']['xaxis']['range'] == pytest.approx([70, 90])
+    assert figure['layout']['yaxis']['range'] == pytest.approx([400, 700])
+
+
+def test_warmup(client):
+    import app
+    body = get_request_body(['warmup-interval.disabled'], [('warmup-interval', 'n_intervals', 3)],
+                            changed=['warmup-interval.n_intervals'])
+
+    # The timer is left untouched while the data loads, so the callbacks using it do not fire again
+    app.dataset_ready.clear()
+    try:
+        assert client.post('/_dash-update-component', json=body).status_code == 204
+    finally:
+        app.dataset_ready.set()
+
+    # It is stopped once the data is loaded
+    r = client.post('/_dash-update-component', json=body)
+    assert json.loads(r.data)['response']['warmup-interval']['disabled'] is True
+
+
+def test_globalstats_unknown_classes(client):
+    _, body = globalstats_request(None, ['Raw'], 'globalstats-dropdown-weight_classes.value')
+
+    # The figures are kept as they are
+    assert client.post('/_dash-update-component', json=body).status_code == 204
@@ -0,0 +1,77 @@
+# Imports
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app_utils import LIFTS, NameIndex, RankingIndex  # noqa: E402
+
+
+# Fixtures
+@pytest.fixture
+def names():
+    """
+    Index some names, with one missing.
+
+    :return: NameIndex, index of the names.
+    """
+    return NameIndex(['John Smith', 'Johnny Walker', 'Anna Johnson', 'Mary Ann Jones', 'Peter Johns', 'Åsa Öberg',
+                      np.nan])
+
+
+@pytest.fixture
+def rankings():
+    """
+    Index the meets of some lifters, with a total of each meet (missing in the last two).
+
+    :return: RankingIndex, index of the meets.
+    """
+    data = pd.DataFrame({'Name': ['A', 'A', 'B', 'C', 'C', 'D'],
+                         'Sex': ['M', 'M', 'M', 'F', 'F', 'F'],
+                         'Equipment': ['Raw', 'Raw', 'Wraps', 'Raw', 'Raw', 'Raw'],
+                         'Federation': ['IPF', 'USPA', 'IPF', 'IPF', 'IPF', 'IPF'],
+                         'Country': ['NOR', 'NOR', 'SWE', 'NOR', 'NOR', 'USA'],
+                         'Total': [500, 550, 520, 300, np.nan, np.nan]})
+
+    return RankingIndex(data.assign(**{lift: data['Total'] for lift in LIFTS if lift != 'Total'}))
+
+
+# Tests
+def test_search_prefix(names):
+    # The names starting with the query come first, then the ones with a word starting with it
+    assert names.search('joh') == ['John Smith', 'Johnny Walker', 'Peter Johns', 'Anna Johnson']
+    assert names.search('  JOHN   smith') == ['John Smith']
+    assert names.search('åsa') == ['Åsa Öberg']
+
+
+def test_search_last_name_first(names):
+    assert names.search('smith john') == ['John Smith']
+    assert names.search('ÖBERG') == ['Åsa Öberg']
+    assert names.search('jones ann') == ['Mary Ann Jones']
+
+
+def test_search_substring(names):
+    # The names containing the query are found only for queries long enough
+    assert names.search('ohn') == ['Anna Johnson', 'John Smith', 'Johnny Walker', 'Peter Johns']
+    assert names.search('oh') == []
+    assert names.search('') == [] and names.search(None) == []
+
+
+def test_search_limit(names):
+    assert names.search('joh', k=2) == ['John Smith', 'Johnny Walker']
+    assert names.search('ohn', k=3) == ['Anna Johnson', 'John Smith', 'Johnny Walker']
+
+
+def test_rank(rankings):
+    # The best meet of each lifter, without the lifters missing the lift
+    assert rankings.rank('Total').tolist() == [1, 2, 3]
+    assert rankings.rank('Total', {'Sex': ()}).tolist() == [1, 2, 3]
+
+
+def test_rank_filters(rankings):
+    assert rankings.rank('Total', {'Federation': ('IPF',)}).tolist() == [2, 0, 3]
+    assert rankings.rank('Total', {'Sex': ('F',)}).tolist() == [3]
+    assert rankings.rank('Total', {'Equipment': ('Raw',), 'Country': ('NOR',)}).tolist() == [1, 3]
+    assert rankings.rank('Total', {'Country': ('XXX',)}).tolist() == []
@@ -0,0 +1,118 @@
+# Imports
+import os
+import sys
+import threading
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+from app_utils import LIFTS, BackendDataset, clean_data, get_best_lifts_per_weightclass, load_data, \
+    plot_best_lifts_of_both_sexes  # noqa: E402
+from backends import MEET_COLUMNS, PandasBackend, DuckDBBackend  # noqa: E402
+from data_store import get_store_path  # noqa: E402
+from generate_data import generate_data  # noqa: E402
+from run_benchmarks import make_store  # noqa: E402
+
+
+# Fixtures
+@pytest.fixture(scope='module')
+def backends(tmp_path_factory):
+    """
+    Open both backends on a small synthetic csv, with every meet of every event.
+
+    :return: tuple, pandas backend and duckdb backend.
+    """
+    folder = tmp_path_factory.mktemp('backends')
+    generate_data(str(folder / 'opl.csv'), 5000, 0)
+    make_store(str(folder / 'opl.csv'), str(folder / 'store'))
+    data = load_data(min_wilks=0, events=[])
+
+    return PandasBackend(data), DuckDBBackend(get_store_path(data.attrs['version']), min_wilks=0, events=[])
+
+
+# Functions
+def get_values(best_lifts, lift):
+    """
+    Get the best lifts of each weight class, regardless of the order of the lifters tied.
+
+    :param pd.DataFrame best_lifts: best lifts, from get_best_lifts_per_weightclass.
+    :param str lift: lift.
+    :return: dict, with the weight class as key and the sorted lifts as value.
+    """
+    return {str(wc): sorted(df[lift].astype('float64')) for wc, df in best_lifts.groupby('WeightClass', observed=True)}
+
+
+def get_meets(meets):
+    """
+    Get the meets of a lifter, regardless of the order of the meets of the same day and of the precision of the
+    weights, single in the data in memory.
+
+    :param pd.DataFrame meets: meets, from lifter_meets.
+    :return: list, sorted meets as tuples of texts.
+    """
+    def to_text(value):
+        if pd.isna(value):
+            return ''
+        return '{:g}'.format(value) if isinstance(value, float) else str(value)
+
+    return sorted(tuple(to_text(value) for value in row) for row in meets[MEET_COLUMNS].itertuples(index=False))
+
+
+# Tests
+@pytest.mark.parametrize('classes, equipment, years', [('IPF', ['Raw'], None),
+                                                       ('WRPF', ['Raw', 'Wraps', 'Single-ply'], (2010, 2015))])
+def test_best_lifts(backends, classes, equipment, years):
+    pandas_backend, duckdb_backend = backends
+    for sex in ['M', 'F']:
+        for lift in LIFTS:
+            expected = get_best_lifts_per_weightclass(clean_data(pandas_backend, classes, equipment, years), lift, sex)
+            found = get_best_lifts_per_weightclass(clean_data(duckdb_backend, classes, equipment, years), lift, sex)
+            assert get_values(found, lift) == get_values(expected, lift)
+            assert not found.duplicated(['WeightClass', 'Name']).any()
+
+
+def test_lifter_meets(backends):
+    pandas_backend, duckdb_backend = backends
+    names = pandas_backend.data['Name'].value_counts().index[:20]
+    for name in names:
+        assert get_meets(duckdb_backend.lifter_meets(name)) == get_meets(pandas_backend.lifter_meets(name))
+        assert duckdb_backend.lifter_meets(name)['Date'].is_monotonic_decreasing
+    assert duckdb_backend.lifter_meets('Nobody').empty
+
+
+def test_lifter_names(backends):
+    pandas_backend, duckdb_backend = backends
+    assert sorted(duckdb_backend.lifter_names()) == sorted(pandas_backend.lifter_names())
+
+
+def test_queries_from_threads(backends):
+    _, duckdb_backend = backends
+    names = duckdb_backend.lifter_names()[:40]
+    errors = []
+
+    # Query the meets of several lifters at once, each thread using its own cursor
+    def query(name):
+        try:
+            assert not duckdb_backend.lifter_meets(name).empty
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_backend_dataset(backends):
+    _, duckdb_backend = backends
+    dataset = BackendDataset(duckdb_backend, 'benchmark')
+
+    # The lifters are searched in memory and their meets and the global stats are queried
+    name = dataset.names.search(duckdb_backend.lifter_names()[0])[0]
+    assert not dataset.get_lifter_meets(name).empty
+    figures = plot_best_lifts_of_both_sexes(dataset, 'IPF', ['Raw'], 10)
+    assert set(figures) == {'M', 'F'} and figures['M']['data']
@@ -0,0 +1,108 @@
+# Imports
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cache import LRUCache  # noqa: E402
+
+
+# Tests
+def test_eviction():
+    cache = LRUCache(2)
+    cache.get_or_compute('v1', 'a', lambda: 1)
+    cache.get_or_compute('v1', 'b', lambda: 2)
+
+    # Using a key keeps it, so the least recently used one is evicted
+    assert cache.get_or_compute('v1', 'a', lambda: None) == 1
+    cache.get_or_compute('v1', 'c', lambda: 3)
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.get_or_compute('v1', 'b', lambda: 4) == 4
+    assert cache.stats() == {'hits': 1, 'misses': 4, 'coalesced': 0, 'entries': 2}
+
+
+def test_new_version():
+    cache = LRUCache(4)
+    cache.get_or_compute('v1', 'a', lambda: 1)
+
+    # A new version forgets the entries of the previous one
+    assert cache.get_or_compute('v2', 'a', lambda: 2) == 2
+    assert dict(cache.entries) == {'a': 2}
+
+
+def test_previous_version():
+    cache = LRUCache(4)
+    cache.get_or_compute('v1', 'a', lambda: 1)
+    cache.get_or_compute('v2', 'a', lambda: 2)
+
+    # A request still using the previous version gets its value, without clearing or storing anything
+    assert cache.get_or_compute('v1', 'a', lambda: 1) == 1
+    assert cache.get_or_compute('v1', 'b', lambda: 3) == 3
+    assert dict(cache.entries) == {'a': 2}
+    assert cache.version == 'v2'
+    assert cache.get_or_compute('v2', 'a', lambda: None) == 2
+
+
+def test_coalesced_computation():
+    cache = LRUCache(4)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 1
+
+    # A second thread asking for the key being computed waits for that computation
+    values = []
+    first = threading.Thread(target=lambda: values.append(cache.get_or_compute('v1', 'a', compute)))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=lambda: values.append(cache.get_or_compute('v1', 'a', compute)))
+    second.start()
+    while cache.stats()['coalesced'] == 0:
+        time.sleep(0.001)
+    release.set()
+    first.join()
+    second.join()
+    assert values == [1, 1]
+    assert len(calls) == 1
+    assert cache.stats() == {'hits': 0, 'misses': 1, 'coalesced': 1, 'entries': 1}
+
+
+def test_coalesced_exception():
+    cache = LRUCache(4)
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise ValueError('failed')
+
+    def ask():
+        try:
+            cache.get_or_compute('v1', 'a', compute)
+        except ValueError as e:
+            errors.append(e)
+
+    # The error of the computation reaches the thread waiting for it, and nothing is stored
+    errors = []
+    first = threading.Thread(target=ask)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=ask)
+    second.start()
+    while cache.stats()['coalesced'] == 0:
+        time.sleep(0.001)
+    release.set()
+    first.join()
+    second.join()
+    assert [str(e) for e in errors] == ['failed', 'failed']
+    assert not cache.entries and not cache.pending
+
+    # The next lookup computes it again
+    assert cache.get_or_compute('v1', 'a', lambda: 1) == 1
@@ -0,0 +1,119 @@
+# Imports
+import hashlib
+import http.server
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from data_store import fetch_file  # noqa: E402
+
+
+# Classes
+class FileHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Stand-in of the server of the data, serving a file with an ETag and honoring Range and If-Range like GitHub does.
+    """
+    payload = b''
+    etag = '"v1"'
+    cut = None
+    headers_seen = []
+
+    def do_GET(self):
+        type(self).headers_seen.append(dict(self.headers))
+
+        # Send the rest of the file only if it has not changed, the whole file otherwise
+        offset = 0
+        if self.headers.get('Range') and self.headers.get('If-Range') == self.etag:
+            offset = int(self.headers['Range'].split('=')[1].rstrip('-'))
+        body = self.payload[offset:]
+        self.send_response(206 if offset else 200)
+        if offset:
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(offset, len(self.payload) - 1, len(self.payload)))
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', self.etag)
+        self.end_headers()
+
+        # Drop the connection after some bytes to interrupt the download
+        if self.cut is not None:
+            self.wfile.write(body[:self.cut])
+            self.wfile.flush()
+            self.close_connection = True
+            type(self).cut = None
+        else:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Fixtures
+@pytest.fixture
+def server():
+    """
+    Run the stand-in server in a thread.
+
+    :return: type, handler of the server, whose attributes set the file served.
+    """
+    FileHandler.payload = os.urandom(256 * 1024)
+    FileHandler.etag = '"v1"'
+    FileHandler.cut = None
+    FileHandler.headers_seen = []
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    FileHandler.url = 'http://127.0.0.1:{}/data.zip'.format(httpd.server_address[1])
+    yield FileHandler
+    httpd.shutdown()
+    httpd.server_close()
+
+
+# Tests
+def test_resume_interrupted_download(server, tmp_path):
+    path = str(tmp_path / 'data.zip')
+
+    # The first download is interrupted and the partial file is kept
+    server.cut = 100 * 1024
+    with pytest.raises(Exception):
+        fetch_file(server.url, path, chunk_size=4096)
+    assert os.path.getsize(path + '.part') == 100 * 1024
+    assert not os.path.exists(path)
+
+    # The second one asks only for the rest of the file
+    assert fetch_file(server.url, path, chunk_size=4096) == '"v1"'
+    assert server.headers_seen[-1]['Range'] == 'bytes={}-'.format(100 * 1024)
+    assert server.headers_seen[-1]['If-Range'] == '"v1"'
+    with open(path, 'rb') as f:
+        assert f.read() == server.payload
+    assert not os.path.exists(path + '.part') and not os.path.exists(path + '.part.json')
+
+
+def test_restart_changed_download(server, tmp_path):
+    path = str(tmp_path / 'data.zip')
+
+    # Interrupt the download of the first version
+    server.cut = 100 * 1024
+    with pytest.raises(Exception):
+        fetch_file(server.url, path, chunk_size=4096)
+
+    # The file changes, so the server ignores the range and the whole new file replaces the partial one
+    server.payload = os.urandom(200 * 1024)
+    server.etag = '"v2"'
+    assert fetch_file(server.url, path, chunk_size=4096) == '"v2"'
+    assert server.headers_seen[-1]['If-Range'] == '"v1"'
+    with open(path, 'rb') as f:
+        assert f.read() == server.payload
+
+
+def test_wrong_checksum(server, tmp_path):
+    path = str(tmp_path / 'data.zip')
+
+    # A corrupted file is removed, so the next download starts again
+    with pytest.raises(IOError, match='Wrong checksum'):
+        fetch_file(server.url, path, sha256='0' * 64)
+    assert os.listdir(str(tmp_path)) == []
+
+    # The right checksum is accepted
+    fetch_file(server.url, path, sha256=hashlib.sha256(server.payload).hexdigest())
+    assert os.path.getsize(path) == len(server.payload)
@@ -0,0 +1,93 @@
+# Imports
+import json
+import numpy as np
+import pandas as pd
+import settings
+
+# Constants
+# Upper bounds in kg of the weight classes of each scheme and sex. The last class has no upper bound and is labeled
+# with the last bound and a '+'
+DEFAULT_SCHEMES = {
+    'IPF': {'M': [59, 66, 74, 83, 93, 105, 120],
+            'F': [47, 52, 57, 63, 72, 84]},
+    'IPF Juniors': {'M': [53, 59, 66, 74, 83, 93, 105, 120],
+                    'F': [43, 47, 52, 57, 63, 72, 84]},
+    'IPF before 2011': {'M': [52, 56, 60, 67.5, 75, 82.5, 90, 100, 110, 125],
+                        'F': [44, 48, 52, 56, 60, 67.5, 75, 82.5, 90]},
+    'WRPF': {'M': [56, 60, 67.5, 75, 82.5, 90, 100, 110, 125, 140],
+             'F': [44, 48, 52, 56, 60, 67.5, 75, 82.5, 90]},
+    'USPA': {'M': [52, 56, 60, 67.5, 75, 82.5, 90, 100, 110, 125, 140],
+             'F': [44, 48, 52, 56, 60, 67.5, 75, 82.5, 90, 100]}
+}
+
+# Bodyweights in kg outside (0, MAX_BODYWEIGHT] are considered wrong and get no weight class
+MAX_BODYWEIGHT = 1000.0
+
+
+# Functions
+def load_schemes(path=settings.WEIGHT_CLASSES):
+    """
+    Load the weight class schemes, the default ones updated with the ones in a json file, if any.
+
+    The json has the name of each scheme as key and, as value, the upper bounds of the weight classes of each sex,
+    like {"USAPL": {"M": [59, 66, ...], "F": [47, 52, ...]}}. A scheme with the name of a default one replaces it.
+
+    :param str path: path to the json, None to use only the default schemes.
+    :return: dict, with the name of each scheme as key and the bounds of each sex as value.
+    """
+    schemes = dict(DEFAULT_SCHEMES)
+    if path:
+        with open(path) as f:
+            schemes.update(json.load(f))
+
+    # Check the bounds
+    for classes, scheme in schemes.items():
+        for sex in ['M', 'F']:
+            bounds = scheme.get(sex)
+            if not bounds or any(a >= b for a, b in zip(bounds[:-1], bounds[1:])):
+                raise ValueError('The bounds of {} for sex {} must be increasing: {}'.format(classes, sex, bounds))
+
+    return schemes
+
+
+def get_weight_classes(classes, sex):
+    """
+    Get weight classes for a given sex and scheme.
+
+    :param str classes: name of the scheme of weight classes, like 'IPF' or 'WRPF'.
+    :param str sex: sex to take weight classes from. 'M' or 'F'.
+    :return: bounds, list with the upper bounds of the weight classes.
+    :return: labels, list with the weight classes.
+    """
+    bounds = SCHEMES[classes][sex]
+    labels = ['{:g}'.format(bound) for bound in bounds] + ['{:g}+'.format(bounds[-1])]
+
+    return bounds, labels
+
+
+def assign_weight_classes(bodyweight, sex, classes):
+    """
+    Assign the weight class of a scheme to each meet, with a binary search of the bodyweight in the bounds of its sex.
+
+    :param np.ndarray bodyweight: bodyweight of each meet.
+    :param np.ndarray sex: sex of each meet.
+    :param str classes: name of the scheme of weight classes.
+    :return: pd.Categorical, weight class of each meet, missing if the bodyweight or the sex are not valid.
+    """
+    # Sort the labels of both sexes together, so the categories do not depend on the order of the schemes
+    labels = {sex: get_weight_classes(classes, sex)[1] for sex in ['M', 'F']}
+    categories = sorted(set(labels['M'] + labels['F']))
+
+    # Find the class of each sex and map it to its category
+    codes = np.full(len(bodyweight), -1, dtype='int8')
+    valid = (bodyweight > 0) & (bodyweight <= MAX_BODYWEIGHT)
+    for s in ['M', 'F']:
+        mask = valid & (sex == s)
+        positions = np.searchsorted(get_weight_classes(classes, s)[0], bodyweight[mask], side='left')
+        codes[mask] = np.array([categories.index(label) for label in labels[s]], dtype='int8')[positions]
+
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+# Weight class schemes available
+SCHEMES = load_schemes()